@@ -0,0 +1,99 @@
+"""
+Letterboxd HTML çıkarma motorlarının karşılaştırması.
+
+    python -m bench.parse_engines                      # bench/fixtures/letterboxd/*.html
+    python -m bench.parse_engines path/to/pages -n 200
+    python -m bench.parse_engines --save https://letterboxd.com/film/the-thing/ ...
+
+Her motor için pages/sec yazar ve tüm motorların aynı LbMeta'yı döndürdüğünü
+kontrol eder (farklıysa exit code 1). --save gerçek sayfaları korpus klasörüne
+<slug>.html olarak indirir (fixture'lar ağ olmadan, gerçek sayfanın yapısı ve
+boyutuyla yeniden kurulmuş kopyalardır; indirilenler onların yerine geçer).
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+from src import letterboxd as lb
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "letterboxd")
+
+
+def _available(engine: str) -> bool:
+    try:
+        lb.parse_html("<html></html>", engine)
+        return True
+    except ImportError:
+        return False
+
+
+def _save(urls, corpus: str) -> None:
+    from src import transport
+
+    os.makedirs(corpus, exist_ok=True)
+    for url in urls:
+        resp = transport.get(url)
+        if resp.status_code != 200:
+            print(f"[save] {url}: HTTP {resp.status_code}")
+            continue
+        slug = lb.film_key(resp.url).rstrip("/").rsplit("/", 1)[-1]
+        path = os.path.join(corpus, f"{slug}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(resp.text)
+        print(f"[save] {path} ({len(resp.content) // 1024} KB)")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser("Letterboxd parser engine benchmark")
+    ap.add_argument("corpus", nargs="?", default=FIXTURES, help="Kaydedilmiş .html dosyaları klasörü")
+    ap.add_argument("-n", "--rounds", type=int, default=50, help="Korpus üzerinden tur sayısı")
+    ap.add_argument("--save", nargs="+", metavar="URL", help="Film sayfalarını korpusa indir, sonra ölç")
+    args = ap.parse_args()
+    if args.save:
+        _save(args.save, args.corpus)
+
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(args.corpus, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages[os.path.basename(path)] = f.read()
+    if not pages:
+        print(f"no .html files in {args.corpus}")
+        return 1
+
+    engines = [e for e in lb.ENGINES if _available(e)]
+    skipped = [e for e in lb.ENGINES if e not in engines]
+    if skipped:
+        print(f"[bench] not installed: {', '.join(skipped)}")
+
+    results = {e: {name: lb.parse_html(html, e).to_dict() for name, html in pages.items()}
+               for e in engines}
+
+    ok = True
+    ref = engines[0]
+    for e in engines[1:]:
+        for name in pages:
+            if results[e][name] != results[ref][name]:
+                ok = False
+                print(f"[mismatch] {name}: {ref}={results[ref][name]} {e}={results[e][name]}")
+
+    size = sum(len(h.encode("utf-8")) for h in pages.values())
+    print(f"[bench] {len(pages)} pages, avg {size / len(pages) / 1024:.0f} KB")
+    total = len(pages) * args.rounds
+    for e in engines:
+        t0 = time.perf_counter()
+        for _ in range(args.rounds):
+            for html in pages.values():
+                lb.parse_html(html, e)
+        dt = time.perf_counter() - t0
+        print(f"{e:>5}: {total / dt:9.1f} pages/sec  ({dt:.2f}s for {total} pages)")
+
+    print("outputs identical" if ok else "OUTPUTS DIFFER")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,537 @@
+"""
+Notion / Letterboxd / TMDb / OMDb için yerel HTTP stand-in'leri (bench/sync.py kullanır).
+
+Tek bir ThreadingHTTPServer tüm servisleri taklit eder:
+  /v1/...                      -> Notion (databases.retrieve/query, pages.retrieve/update/create)
+  Host: letterboxd.com         -> /film/<slug>/ film sayfası
+  Host: boxd.it                -> /<kod> -> 301 letterboxd.com/film/<slug>/
+  Host: api.themoviedb.org     -> /3/search/movie, /3/movie/<id>[/credits|/videos], /3/find/<imdb>
+  Host: omdbapi.com            -> /?i=<imdb> | /?t=<başlık>&y=<yıl>
+
+Sync süreci HTTP_HOST_MAP ile diğer host'ları buraya, NOTION_BASE_URL ile Notion'ı
+buraya yönlendirir. Veritabanı sentetiktir: satır i -> "Film i", deterministik ID'ler;
+sayfalar ancak yazılınca bellekte tutulur (100k satır sorun değil).
+"""
+from __future__ import annotations
+
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from src.config import NOTION_COLS
+
+DATABASE_ID = "b3c4a0e2-0000-4000-8000-00000000be9c"
+
+# Kolon tipleri (config.py'deki açıklamalarla aynı)
+_TYPES = {
+    "name": "title", "letterboxd": "url", "year": "number", "runtime": "number",
+    "director": "multi_select", "writer": "multi_select", "cinematography": "multi_select",
+    "cast_top": "multi_select", "poster": "url", "backdrop": "url", "trailer_url": "url",
+    "original_title": "rich_text", "synopsis": "rich_text", "countries": "multi_select",
+    "languages": "multi_select", "imdb_id": "rich_text", "tmdb_id": "number",
+}
+_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+_B36 = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _iso(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def short_code(i: int) -> str:
+    s = ""
+    i += 36 ** 2          # en az 3 karakter
+    while i:
+        i, r = divmod(i, 36)
+        s = _B36[r] + s
+    return s
+
+
+def _from_code(code: str) -> Optional[int]:
+    try:
+        return int(code, 36) - 36 ** 2
+    except ValueError:
+        return None
+
+
+# -----------------------------
+# Sentetik film verisi (satır indeksinden)
+# -----------------------------
+def film(i: int) -> Dict[str, Any]:
+    return {
+        "i": i,
+        "title": f"Film {i}",
+        "slug": f"film-{i}",
+        "year": 1950 + i % 70,
+        "tmdb_id": 100000 + i,
+        "imdb_id": f"tt{1000000 + i:07d}",
+        "runtime": 80 + i % 90,
+    }
+
+
+def _film_by_tmdb(tmdb_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        i = int(tmdb_id) - 100000
+    except ValueError:
+        return None
+    return film(i) if i >= 0 else None
+
+
+def _film_by_imdb(imdb_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        i = int(imdb_id[2:]) - 1000000
+    except ValueError:
+        return None
+    return film(i) if i >= 0 else None
+
+
+def _film_by_title(title: str) -> Optional[Dict[str, Any]]:
+    parts = title.strip().split()
+    if len(parts) == 2 and parts[0].lower() == "film" and parts[1].isdigit():
+        return film(int(parts[1]))
+    return None
+
+
+# -----------------------------
+# Notion
+# -----------------------------
+def _rt(s: str) -> List[Dict[str, Any]]:
+    return [{"type": "text", "text": {"content": s, "link": None}, "plain_text": s, "href": None}]
+
+
+def _prop_value(ptype: str, v: Any) -> Any:
+    if ptype in ("title", "rich_text"):
+        return _rt(str(v)) if v not in (None, "") else []
+    if ptype == "multi_select":
+        return [{"name": n} for n in (v or [])]
+    return v
+
+
+def _is_empty(prop: Dict[str, Any]) -> bool:
+    v = prop.get(prop["type"])
+    return v in (None, "", [])
+
+
+class NotionDB:
+    """
+    Satır i'nin sayfası istek anında üretilir; yazılan/oluşturulan sayfalar
+    `_pages`'te tutulur. `filled` oranındaki ilk satırlar tamamen dolu gelir.
+    """
+
+    def __init__(self, rows: int, filled: float = 0.0, short_ratio: float = 0.25) -> None:
+        self.rows = rows
+        self.filled = int(rows * filled)
+        self.short_every = int(1 / short_ratio) if short_ratio > 0 else 0
+        self.cols = {k: c for k, c in NOTION_COLS.items() if k in _TYPES}
+        self.schema = {
+            col: {"id": "title" if _TYPES[k] == "title" else f"p{n:02d}", "name": col, "type": _TYPES[k]}
+            for n, (k, col) in enumerate(self.cols.items())
+        }
+        self._pages: Dict[int, Dict[str, Any]] = {}
+        self._queries: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def page_id(i: int) -> str:
+        return f"00000000-0000-4000-8000-{i:012x}"
+
+    def _index(self, page_id: str) -> Optional[int]:
+        page_id = page_id.replace("-", "")
+        try:
+            i = int(page_id[-12:], 16)
+        except ValueError:
+            return None
+        return i if 0 <= i < self.rows else None
+
+    def _fresh(self, i: int) -> Dict[str, Any]:
+        f = film(i)
+        if self.short_every and i % self.short_every == 0:
+            lb_url = f"https://boxd.it/{short_code(i)}"
+        else:
+            lb_url = f"https://letterboxd.com/film/{f['slug']}/"
+        values: Dict[str, Any] = {"name": f["title"], "letterboxd": lb_url}
+        if i < self.filled:
+            values.update({
+                "year": f["year"], "runtime": f["runtime"], "director": [f"Director {i % 500}"],
+                "writer": [f"Writer {i % 700}"], "cinematography": [f"DoP {i % 300}"],
+                "cast_top": [f"Actor {i % 900}", f"Actor {(i + 1) % 900}"],
+                "poster": f"https://image.tmdb.org/t/p/w500/p{i}.jpg",
+                "backdrop": f"https://image.tmdb.org/t/p/w780/b{i}.jpg",
+                "trailer_url": f"https://youtu.be/t{i}", "original_title": f["title"],
+                "synopsis": f"Synopsis of {f['title']}.", "countries": ["France"],
+                "languages": ["French"], "imdb_id": f["imdb_id"], "tmdb_id": f["tmdb_id"],
+            })
+        return {
+            "object": "page",
+            "id": self.page_id(i),
+            "created_time": _iso(_EPOCH + timedelta(seconds=i)),
+            "last_edited_time": _iso(_EPOCH + timedelta(seconds=i)),
+            "archived": False,
+            "cover": None,
+            "parent": {"type": "database_id", "database_id": DATABASE_ID},
+            "properties": {
+                col: {"id": self.schema[col]["id"], "type": self.schema[col]["type"],
+                      self.schema[col]["type"]: _prop_value(self.schema[col]["type"], values.get(k))}
+                for k, col in self.cols.items()
+            },
+        }
+
+    def _page(self, i: int) -> Dict[str, Any]:
+        return self._pages.get(i) or self._fresh(i)
+
+    def _project(self, page: Dict[str, Any], ids: Optional[List[str]]) -> Dict[str, Any]:
+        if not ids:
+            return page
+        keep = set(ids)
+        props = {c: p for c, p in page["properties"].items() if p["id"] in keep}
+        return {**page, "properties": props}
+
+    def _match(self, page: Dict[str, Any], f: Optional[Dict[str, Any]]) -> bool:
+        if not f:
+            return True
+        if "and" in f:
+            return all(self._match(page, x) for x in f["and"])
+        if "or" in f:
+            return any(self._match(page, x) for x in f["or"])
+        if f.get("timestamp") == "last_edited_time":
+            t = page["last_edited_time"]
+            cond = f.get("last_edited_time") or {}
+            if "on_or_after" in cond:
+                return t >= _iso(datetime.fromisoformat(cond["on_or_after"].replace("Z", "+00:00")))
+            if "after" in cond:
+                return t > _iso(datetime.fromisoformat(cond["after"].replace("Z", "+00:00")))
+            return True
+        prop = page["properties"].get(f.get("property"))
+        if prop is None:
+            return False
+        cond = f.get(prop["type"]) or {}
+        if cond.get("is_empty"):
+            return _is_empty(prop)
+        if cond.get("is_not_empty"):
+            return not _is_empty(prop)
+        if "equals" in cond:
+            v = prop.get(prop["type"])
+            if isinstance(v, list):
+                v = "".join(t.get("plain_text", "") for t in v)
+            return v == cond["equals"]
+        return True
+
+    # --- endpoints ---
+    def retrieve_database(self) -> Dict[str, Any]:
+        return {"object": "database", "id": DATABASE_ID, "properties": self.schema}
+
+    def query(self, body: Dict[str, Any], filter_properties: List[str]) -> Dict[str, Any]:
+        size = min(100, int(body.get("page_size") or 100))
+        cursor = body.get("start_cursor")
+        with self._lock:
+            if cursor:
+                qid, _, off = cursor.partition(":")
+                matched, offset = self._queries.get(qid, []), int(off or 0)
+            else:
+                # Eşleşmeler sorgu başında bir kez hesaplanır; imleç bu listeyi gezer
+                # Arşivlenmiş sayfalar sorguda dönmez (Notion gibi)
+                matched = [i for i in range(self.rows)
+                           if not self._page(i).get("archived") and self._match(self._page(i), body.get("filter"))]
+                for s in body.get("sorts") or []:
+                    if s.get("timestamp") == "last_edited_time":
+                        matched.sort(key=lambda i: self._page(i)["last_edited_time"],
+                                     reverse=s.get("direction") == "descending")
+                qid, offset = uuid.uuid4().hex[:12], 0
+                self._queries[qid] = matched
+            chunk = matched[offset:offset + size]
+            results = [self._project(self._page(i), filter_properties) for i in chunk]
+        more = offset + size < len(matched)
+        return {"object": "list", "results": results, "has_more": more,
+                "next_cursor": f"{qid}:{offset + size}" if more else None}
+
+    def retrieve_page(self, page_id: str) -> Optional[Dict[str, Any]]:
+        i = self._index(page_id)
+        if i is None:
+            return None
+        with self._lock:
+            return self._page(i)
+
+    def update_page(self, page_id: str, body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        i = self._index(page_id)
+        if i is None:
+            return None
+        with self._lock:
+            page = json.loads(json.dumps(self._page(i)))
+            self._apply(page, body)
+            self._pages[i] = page
+            return page
+
+    def create_page(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            i = self.rows
+            self.rows += 1
+            page = self._fresh(i)
+            for p in page["properties"].values():
+                p[p["type"]] = [] if p["type"] in ("title", "rich_text", "multi_select") else None
+            self._apply(page, body)
+            self._pages[i] = page
+            return page
+
+    def _apply(self, page: Dict[str, Any], body: Dict[str, Any]) -> None:
+        for col, val in (body.get("properties") or {}).items():
+            prop = page["properties"].get(col)
+            if prop is None:
+                continue
+            ptype = prop["type"]
+            v = val.get(ptype)
+            if ptype in ("title", "rich_text"):
+                v = _rt("".join(t.get("text", {}).get("content", "") for t in v or [])) if v else []
+            elif ptype == "multi_select":
+                v = [{"name": o["name"]} for o in v or []]
+            prop[ptype] = v
+        if "cover" in body:
+            page["cover"] = body["cover"]
+        if "archived" in body:
+            page["archived"] = body["archived"]
+        page["last_edited_time"] = _iso(datetime.now(timezone.utc))
+
+
+# -----------------------------
+# Letterboxd / TMDb / OMDb yanıtları
+# -----------------------------
+_REVIEW = "<div class=\"review\"><p>" + "Lorem ipsum dolor sit amet. " * 40 + "</p></div>\n"
+
+
+def letterboxd_html(f: Dict[str, Any], reviews: int = 60) -> str:
+    # Gerçek sayfalar gibi: kimlikler/başlık üstte, uzun yorum listesi altta
+    return (
+        "<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"UTF-8\">\n"
+        f"<title>{f['title']} ({f['year']}) &bull; Letterboxd</title>\n"
+        f"<meta content=\"{f['title']} ({f['year']})\" property=\"og:title\" />\n"
+        "</head>\n<body class=\"film\">\n<div id=\"content\">\n"
+        "<section class=\"film-header-group\">\n<h1 class=\"headline-1 filmtitle\">"
+        f"<span class=\"name\">{f['title']}</span> <small class=\"number\">"
+        f"<a href=\"/films/year/{f['year']}/\">{f['year']}</a></small></h1>\n</section>\n"
+        f"<p class=\"text-link text-footer\">{f['runtime']}&nbsp;mins More at "
+        f"<a href='https://www.imdb.com/title/{f['imdb_id']}/maindetails'>IMDb</a> "
+        f"<a href='https://www.themoviedb.org/movie/{f['tmdb_id']}/'>TMDb</a></p>\n"
+        "<script type=\"application/ld+json\">\n/* <![CDATA[ */\n"
+        + json.dumps({"@context": "http://schema.org", "@type": "Movie", "name": f["title"],
+                      "releasedEvent": [{"@type": "PublicationEvent", "startDate": str(f["year"])}]})
+        + "\n/* ]]> */\n</script>\n<section class=\"reviews\">\n"
+        + _REVIEW * reviews
+        + "</section>\n</div>\n</body>\n</html>\n"
+    )
+
+
+def _tmdb_summary(f: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": f["tmdb_id"], "title": f["title"], "original_title": f["title"],
+        "release_date": f"{f['year']}-06-01", "overview": f"Synopsis of {f['title']}.",
+        "poster_path": f"/p{f['i']}.jpg", "backdrop_path": f"/b{f['i']}.jpg",
+        "popularity": 1000.0 / (1 + f["i"]),
+    }
+
+
+def _tmdb_credits(f: Dict[str, Any]) -> Dict[str, Any]:
+    i = f["i"]
+    return {
+        "id": f["tmdb_id"],
+        "cast": [{"name": f"Actor {(i + k) % 900}", "order": k} for k in range(8)],
+        "crew": [
+            {"name": f"Director {i % 500}", "job": "Director"},
+            {"name": f"Writer {i % 700}", "job": "Screenplay"},
+            {"name": f"DoP {i % 300}", "job": "Director of Photography"},
+        ],
+    }
+
+
+def _tmdb_videos(f: Dict[str, Any]) -> Dict[str, Any]:
+    return {"id": f["tmdb_id"], "results": [{"site": "YouTube", "type": "Trailer", "key": f"t{f['i']}"}]}
+
+
+def _tmdb_details(f: Dict[str, Any], append: List[str]) -> Dict[str, Any]:
+    d = {
+        **_tmdb_summary(f), "imdb_id": f["imdb_id"], "runtime": f["runtime"],
+        "production_countries": [{"iso_3166_1": "FR", "name": "France"}],
+        "spoken_languages": [{"iso_639_1": "fr", "english_name": "French"}],
+    }
+    if "credits" in append:
+        d["credits"] = _tmdb_credits(f)
+    if "videos" in append:
+        d["videos"] = _tmdb_videos(f)
+    return d
+
+
+def _omdb(f: Dict[str, Any]) -> Dict[str, Any]:
+    i = f["i"]
+    return {
+        "Title": f["title"], "Year": str(f["year"]), "Runtime": f"{f['runtime']} min",
+        "Director": f"Director {i % 500}", "Writer": f"Writer {i % 700} (screenplay)",
+        "Actors": f"Actor {i % 900}, Actor {(i + 1) % 900}, Actor {(i + 2) % 900}",
+        "Plot": f"Synopsis of {f['title']}.", "Country": "France", "Language": "French",
+        "Poster": f"https://m.media-amazon.com/images/p{i}.jpg", "imdbID": f["imdb_id"],
+        "Response": "True",
+    }
+
+
+# -----------------------------
+# Sunucu
+# -----------------------------
+class StandIns(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, db: NotionDB, latency_ms: float = 0.0, notion_latency_ms: Optional[float] = None,
+                 rate_429: float = 0.0, retry_after: float = 1.0, port: int = 0) -> None:
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.db = db
+        self.latency = latency_ms / 1000.0
+        self.notion_latency = self.latency if notion_latency_ms is None else notion_latency_ms / 1000.0
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.requests: Counter = Counter()
+        self.throttled: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def host_map(self) -> str:
+        return ",".join(f"{h}={self.base_url}"
+                        for h in ("letterboxd.com", "boxd.it", "api.themoviedb.org", "omdbapi.com"))
+
+    def start(self) -> "StandIns":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Streaming okuyan istemci (Letterboxd erken durma) bağlantıyı keser; gürültü değil
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+    def count(self, host: str) -> bool:
+        """İsteği say; 429 enjekte edilecekse True."""
+        throttle = self.rate_429 > 0 and random.random() < self.rate_429
+        with self._lock:
+            self.requests[host] += 1
+            if throttle:
+                self.throttled[host] += 1
+        return throttle
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StandIns
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+    def _send(self, status: int, body: Any = None, headers: Optional[Dict[str, str]] = None,
+              ctype: str = "application/json") -> None:
+        data = b"" if body is None else (body if isinstance(body, bytes) else
+                                         (body if isinstance(body, str) else json.dumps(body)).encode())
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _body(self) -> Dict[str, Any]:
+        n = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(n) or b"{}") if n else {}
+
+    def _route(self) -> None:
+        url = urlparse(self.path)
+        qs = parse_qs(url.query)
+        is_notion = url.path.startswith("/v1/")
+        host = "api.notion.com" if is_notion else (self.headers.get("Host") or "").split(":")[0].lower()
+        if host.startswith("www."):
+            host = host[4:]
+        body = self._body() if self.command in ("POST", "PATCH") else {}
+
+        delay = self.server.notion_latency if is_notion else self.server.latency
+        if delay:
+            time.sleep(random.uniform(0.5, 1.5) * delay)
+        if self.server.count(host):
+            ra = {"Retry-After": f"{self.server.retry_after:g}"}
+            if is_notion:
+                return self._send(429, {"object": "error", "status": 429, "code": "rate_limited",
+                                        "message": "Rate limited (stand-in)"}, ra)
+            return self._send(429, {"status_message": "rate limited"}, ra)
+
+        if is_notion:
+            return self._notion(url.path, body, qs)
+        if host == "boxd.it":
+            i = _from_code(url.path.strip("/"))
+            if i is None:
+                return self._send(404, "", ctype="text/html")
+            return self._send(301, "", {"Location": f"https://letterboxd.com/film/film-{i}/"}, "text/html")
+        if host == "letterboxd.com":
+            parts = url.path.strip("/").split("/")
+            f = _film_by_title(parts[1].replace("-", " ")) if len(parts) == 2 and parts[0] == "film" else None
+            if not f:
+                return self._send(404, "<html>not found</html>", ctype="text/html")
+            return self._send(200, letterboxd_html(f), ctype="text/html; charset=utf-8")
+        if host == "api.themoviedb.org":
+            return self._tmdb(url.path, qs)
+        if host == "omdbapi.com":
+            f = (_film_by_imdb(qs["i"][0]) if "i" in qs else
+                 _film_by_title(qs["t"][0]) if "t" in qs else None)
+            return self._send(200, _omdb(f) if f else {"Response": "False", "Error": "Movie not found!"})
+        return self._send(404, {"error": f"unknown host {host}"})
+
+    def _notion(self, path: str, body: Dict[str, Any], qs: Dict[str, List[str]]) -> None:
+        db = self.server.db
+        parts = path.strip("/").split("/")[1:]
+        page = None
+        if parts[:1] == ["databases"] and len(parts) == 2 and self.command == "GET":
+            return self._send(200, db.retrieve_database())
+        if parts[:1] == ["databases"] and parts[-1:] == ["query"] and self.command == "POST":
+            return self._send(200, db.query(body, qs.get("filter_properties") or []))
+        if parts == ["pages"] and self.command == "POST":
+            return self._send(200, db.create_page(body))
+        if parts[:1] == ["pages"] and len(parts) == 2:
+            if self.command == "GET":
+                page = db.retrieve_page(parts[1])
+            elif self.command == "PATCH":
+                current = db.retrieve_page(parts[1])
+                if current and current.get("archived") and body.get("archived") is not False:
+                    return self._send(400, {"object": "error", "status": 400, "code": "validation_error",
+                                            "message": "Can't edit block that is archived. "
+                                                       "You must unarchive the block before editing."})
+                page = db.update_page(parts[1], body)
+        if page is None:
+            return self._send(404, {"object": "error", "status": 404, "code": "object_not_found",
+                                    "message": f"{self.command} {path}"})
+        return self._send(200, page)
+
+    def _tmdb(self, path: str, qs: Dict[str, List[str]]) -> None:
+        parts = path.strip("/").split("/")[1:]
+        if parts == ["search", "movie"]:
+            f = _film_by_title((qs.get("query") or [""])[0])
+            return self._send(200, {"page": 1, "results": [_tmdb_summary(f)] if f else [],
+                                    "total_results": int(bool(f))})
+        if parts[:1] == ["find"] and len(parts) == 2:
+            f = _film_by_imdb(parts[1])
+            return self._send(200, {"movie_results": [_tmdb_summary(f)] if f else []})
+        if parts[:1] == ["movie"] and len(parts) >= 2:
+            f = _film_by_tmdb(parts[1])
+            if f:
+                if len(parts) == 2:
+                    append = (qs.get("append_to_response") or [""])[0].split(",")
+                    return self._send(200, _tmdb_details(f, append))
+                if parts[2] == "credits":
+                    return self._send(200, _tmdb_credits(f))
+                if parts[2] == "videos":
+                    return self._send(200, _tmdb_videos(f))
+        return self._send(404, {"status_code": 34, "status_message": "not found"})
+
+    do_GET = do_POST = do_PATCH = do_HEAD = _route
@@ -0,0 +1,88 @@
+"""
+CLI açılış süresi: import maliyeti ve `--help` duvar saati.
+
+    python -m bench.startup              # 10 tur, en pahalı 15 modül
+    python -m bench.startup -n 20 --top 30
+
+`python -X importtime -c "import src.main"` çıktısındaki kümülatif süreleri
+turlar arası medyanla özetler; ardından `python -m src.main --help`'i ölçer.
+Token gerekmez (Notion client ilk çağrıda kurulur).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_LINE_RX = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _importtime(target: str) -> Dict[str, tuple]:
+    """{modül: (self_us, cumulative_us, derinlik)} -- tek süreç."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {target}"],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(proc.returncode)
+    out = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE_RX.match(line)
+        if m:
+            out[m.group(4)] = (int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2)
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser("CLI startup benchmark")
+    ap.add_argument("-n", "--rounds", type=int, default=10, help="Tur sayısı (medyan alınır)")
+    ap.add_argument("--top", type=int, default=15, help="Listelenecek en pahalı modül sayısı")
+    ap.add_argument("--module", default="src.main", help="Ölçülecek modül")
+    args = ap.parse_args()
+
+    cum: Dict[str, List[int]] = defaultdict(list)
+    own: Dict[str, List[int]] = defaultdict(list)
+    totals = []
+    for _ in range(args.rounds):
+        rows = _importtime(args.module)
+        totals.append(rows[args.module][1] if args.module in rows else 0)
+        for mod, (self_us, cum_us, _) in rows.items():
+            cum[mod].append(cum_us)
+            own[mod].append(self_us)
+
+    print(f"import {args.module}: {statistics.median(totals) / 1000:.1f} ms (median of {args.rounds})")
+    ours = sorted((m for m in cum if m.split(".")[0] == args.module.split(".")[0]),
+                  key=lambda m: -statistics.median(cum[m]))
+    for mod in ours:
+        print(f"  {mod:<28} cumulative {statistics.median(cum[mod]) / 1000:7.1f} ms"
+              f"   self {statistics.median(own[mod]) / 1000:6.1f} ms")
+
+    print(f"top {args.top} modules by self time:")
+    heavy = sorted(own, key=lambda m: -statistics.median(own[m]))[:args.top]
+    for mod in heavy:
+        print(f"  {mod:<40} {statistics.median(own[mod]) / 1000:7.1f} ms")
+
+    env = {k: v for k, v in os.environ.items() if k != "NOTION_TOKEN"}
+    walls = []
+    for _ in range(args.rounds):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-m", "src.main", "--help"], cwd=ROOT, env=env,
+                              capture_output=True, text=True)
+        walls.append(time.perf_counter() - t0)
+        if proc.returncode:
+            sys.stderr.write(proc.stderr)
+            print("src.main --help failed")
+            return 1
+    print(f"python -m src.main --help: {statistics.median(walls) * 1000:.0f} ms wall "
+          f"(median of {args.rounds}, NOTION_TOKEN unset)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
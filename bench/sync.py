@@ -0,0 +1,113 @@
+"""
+Uçtan uca sync benchmark'ı: gerçek `python -m src.main` yerel stand-in'lere karşı çalışır.
+
+    python -m bench.sync --rows 1000                         # 1k satır, hepsi eksik
+    python -m bench.sync --rows 100000 --limit 2000 --workers 8 --latency-ms 40 --rate-429 0.01
+    python -m bench.sync --rows 5000 --notion-rate 50 -- --snapshot
+
+`--` sonrası argümanlar olduğu gibi src.main'e geçer. Her çalışma boş bir cache
+klasörüyle başlar (--cache-dir verilmezse). Rapor: satır/sn, host başına satır
+başı istek, enjekte edilen 429'lar ve sync sürecinin tepe RSS'i.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench.standins import DATABASE_ID, NotionDB, StandIns
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser("Offline sync benchmark")
+    ap.add_argument("--rows", type=int, default=1000, help="Sentetik Notion veritabanı satır sayısı")
+    ap.add_argument("--filled", type=float, default=0.0, help="Tamamen dolu gelen satır oranı (0-1)")
+    ap.add_argument("--short-ratio", type=float, default=0.25, help="boxd.it kısa linkli satır oranı")
+    ap.add_argument("--latency-ms", type=float, default=20.0, help="Letterboxd/TMDb/OMDb yanıt gecikmesi")
+    ap.add_argument("--notion-latency-ms", type=float, default=None, help="Notion gecikmesi (varsayılan: --latency-ms)")
+    ap.add_argument("--rate-429", type=float, default=0.0, help="429 dönme olasılığı (tüm host'lar)")
+    ap.add_argument("--retry-after", type=float, default=1.0, help="429 yanıtlarındaki Retry-After (sn)")
+    ap.add_argument("--notion-rate", type=float, default=3.0, help="Sync'in Notion token bucket hızı (istek/sn)")
+    ap.add_argument("--no-omdb", action="store_true", help="OMDb anahtarını verme (sadece TMDb)")
+    ap.add_argument("--workers", type=int, default=4, help="src.main --workers")
+    ap.add_argument("--limit", type=int, default=0, help="src.main --limit (0=limitsiz)")
+    ap.add_argument("--cache-dir", help="Sync cache klasörü (varsayılan: geçici, boş)")
+    ap.add_argument("--json", metavar="PATH", help="Raporu JSON olarak da yaz")
+    ap.add_argument("-v", "--verbose", action="store_true", help="Sync çıktısını göster")
+    ap.add_argument("sync_args", nargs=argparse.REMAINDER, help="-- sonrası src.main'e geçer")
+    args = ap.parse_args()
+
+    extra = args.sync_args[1:] if args.sync_args[:1] == ["--"] else args.sync_args
+    server = StandIns(NotionDB(args.rows, args.filled, args.short_ratio),
+                      latency_ms=args.latency_ms, notion_latency_ms=args.notion_latency_ms,
+                      rate_429=args.rate_429, retry_after=args.retry_after).start()
+
+    with tempfile.TemporaryDirectory(prefix="bench-sync-") as tmp:
+        cache_dir = args.cache_dir or os.path.join(tmp, "cache")
+        env = {
+            **os.environ,
+            "NOTION_TOKEN": "bench",
+            "NOTION_DATABASE_ID": DATABASE_ID,
+            "NOTION_BASE_URL": server.base_url,
+            "NOTION_RATE": str(args.notion_rate),
+            "HTTP_HOST_MAP": server.host_map(),
+            "TMDB_API_KEY": "bench",
+            "OMDB_API_KEY": "" if args.no_omdb else "bench",
+        }
+        cmd = [sys.executable, "-m", "src.main", "--cache-dir", cache_dir,
+               "--workers", str(args.workers), "--limit", str(args.limit), *extra]
+        print(f"[bench] rows={args.rows} latency={args.latency_ms}ms 429={args.rate_429} "
+              f"notion-rate={args.notion_rate}/s :: {' '.join(cmd[2:])}", flush=True)
+
+        t0 = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True)
+        wall = time.perf_counter() - t0
+        peak_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+    server.shutdown()
+    out = proc.stdout + proc.stderr
+    if args.verbose or proc.returncode:
+        print(out)
+    if proc.returncode:
+        print(f"[bench] sync exited with {proc.returncode}")
+        return proc.returncode
+
+    m = re.search(r"\[debug\] fetched (\d+) rows", out)
+    fetched = int(m.group(1)) if m else 0
+    m = re.search(r"Done\. Updated (\d+) pages", out)
+    updated = int(m.group(1)) if m else 0
+    rows = fetched or updated
+
+    report = {
+        "rows": rows,
+        "updated": updated,
+        "wall_s": round(wall, 3),
+        "rows_per_s": round(rows / wall, 2) if wall else 0.0,
+        "requests": dict(server.requests),
+        "requests_per_row": {h: round(n / rows, 3) for h, n in server.requests.items()} if rows else {},
+        "throttled": dict(server.throttled),
+        "peak_rss_mb": round(peak_kb / 1024, 1),
+    }
+
+    print(f"rows:      {rows} fetched, {updated} updated in {wall:.2f}s -> {report['rows_per_s']} rows/sec")
+    for host in sorted(server.requests):
+        print(f"  {host:<20} {server.requests[host]:>8} req  {report['requests_per_row'].get(host, 0):>6} /row"
+              f"  429={server.throttled.get(host, 0)}")
+    print(f"peak RSS:  {report['peak_rss_mb']} MB (sync process)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
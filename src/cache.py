@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from . import metrics
+
+# -----------------------------
+# Yerel metadata cache (SQLite)
+# -----------------------------
+# Namespace başına TTL (saniye). None -> süresiz.
+TTLS: Dict[str, Optional[int]] = {
+    "lb":   30 * 24 * 3600,   # Letterboxd meta (başlık/yıl/ID'ler) nadiren değişir
+    "omdb": 7 * 24 * 3600,
+    "tmdb": 7 * 24 * 3600,
+}
+MAX_ENTRIES = 20000
+_EVICT_EVERY = 200  # her N put'ta bir boyut kontrolü
+
+STATS = {"hits": 0, "misses": 0, "puts": 0, "evicted": 0}
+metrics.register("cache", STATS)
+
+_conn: Optional[sqlite3.Connection] = None
+_lock = threading.Lock()
+_max_entries = MAX_ENTRIES
+_puts_since_evict = 0
+
+
+def configure(cache_dir: str, enabled: bool = True, max_entries: int = MAX_ENTRIES) -> None:
+    """Cache'i aç. enabled=False ise get() hep None döner, put() hiçbir şey yapmaz."""
+    global _conn, _max_entries
+    close()
+    _max_entries = max_entries
+    if not enabled or not cache_dir:
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(cache_dir, "cache.sqlite"), check_same_thread=False)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS entries ("
+        " ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+        " created REAL NOT NULL, accessed REAL NOT NULL,"
+        " PRIMARY KEY (ns, key))"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+    conn.commit()
+    _conn = conn
+
+
+def close() -> None:
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.commit()
+            _conn.close()
+            _conn = None
+
+
+def enabled() -> bool:
+    return _conn is not None
+
+
+def get(ns: str, key: Optional[str]) -> Any:
+    if _conn is None or not key:
+        return None
+    now = time.time()
+    with _lock:
+        row = _conn.execute(
+            "SELECT value, created FROM entries WHERE ns = ? AND key = ?", (ns, key)
+        ).fetchone()
+        if row is None:
+            STATS["misses"] += 1
+            metrics.incr(f"cache.{ns}.misses")
+            return None
+        ttl = TTLS.get(ns)
+        if ttl is not None and now - row[1] > ttl:
+            _conn.execute("DELETE FROM entries WHERE ns = ? AND key = ?", (ns, key))
+            STATS["misses"] += 1
+            metrics.incr(f"cache.{ns}.misses")
+            return None
+        _conn.execute(
+            "UPDATE entries SET accessed = ? WHERE ns = ? AND key = ?", (now, ns, key)
+        )
+        STATS["hits"] += 1
+        metrics.incr(f"cache.{ns}.hits")
+    return json.loads(row[0])
+
+
+def put(ns: str, key: Optional[str], value: Any) -> None:
+    global _puts_since_evict
+    if _conn is None or not key:
+        return
+    now = time.time()
+    with _lock:
+        _conn.execute(
+            "INSERT OR REPLACE INTO entries (ns, key, value, created, accessed)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (ns, key, json.dumps(value, ensure_ascii=False), now, now),
+        )
+        STATS["puts"] += 1
+        _puts_since_evict += 1
+        if _puts_since_evict >= _EVICT_EVERY:
+            _puts_since_evict = 0
+            _evict_locked()
+        _conn.commit()
+
+
+def _evict_locked() -> None:
+    """LRU: en eski erişilen kayıtları sil, toplam _max_entries'i geçmesin."""
+    (count,) = _conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+    extra = count - _max_entries
+    if extra > 0:
+        _conn.execute(
+            "DELETE FROM entries WHERE rowid IN"
+            " (SELECT rowid FROM entries ORDER BY accessed ASC LIMIT ?)",
+            (extra,),
+        )
+        STATS["evicted"] += extra
+
+
+def clear(ns: Optional[str] = None) -> None:
+    if _conn is None:
+        return
+    with _lock:
+        if ns:
+            _conn.execute("DELETE FROM entries WHERE ns = ?", (ns,))
+        else:
+            _conn.execute("DELETE FROM entries")
+        _conn.commit()
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, Optional
+
+# -----------------------------
+# Küçük JSON checkpoint dosyaları (incremental watermark vb.)
+# -----------------------------
+
+
+def load(path: str, default: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Checkpoint'i oku; yoksa/bozuksa default'un kopyasını döndür."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return data
+    except (OSError, ValueError):
+        pass
+    return json.loads(json.dumps(default or {}))
+
+
+def save(path: str, data: Dict[str, Any]) -> None:
+    """Atomik yaz: önce geçici dosya, sonra os.replace (yarım dosya kalmaz)."""
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
@@ -11,6 +11,16 @@ NOTION_DATABASE_ID = os.environ.get("NOTION_DATABASE_ID", "").strip()
 OMDB_API_KEY = os.environ.get("OMDB_API_KEY", "").strip()
 TMDB_API_KEY = os.environ.get("TMDB_API_KEY", "").strip()
 
+# Test/benchmark için: Notion API kökü ve diğer host'ların yönlendirilmesi
+# (ör. HTTP_HOST_MAP="letterboxd.com=http://127.0.0.1:8765,api.themoviedb.org=http://127.0.0.1:8765")
+NOTION_BASE_URL = os.environ.get("NOTION_BASE_URL", "").strip()
+HTTP_HOST_MAP = os.environ.get("HTTP_HOST_MAP", "").strip()
+# Notion ortalama ~3 istek/sn'ye izin veriyor; stand-in'lere karşı yükseltilebilir
+NOTION_RATE = float(os.environ.get("NOTION_RATE", "3") or 3)
+
+# OMDb ücretsiz anahtar günlük ~1000 istek; bütçe bitince TMDb'ye düşülür
+OMDB_DAILY_BUDGET = int(os.environ.get("OMDB_DAILY_BUDGET", "1000") or 1000)
+
 # -----------------------------
 # Notion Column Mapping
 # -----------------------------
@@ -36,4 +46,9 @@ NOTION_COLS = {
 
     "countries":       "Countries",         # multi-select
     "languages":       "Languages",         # multi-select
+
+    # Opsiyonel: veritabanında yoksa atlanır. Doluysa Letterboxd taraması
+    # atlanıp doğrudan ID ile detay çekilir; boşsa bulunan ID geri yazılır.
+    "imdb_id":         "IMDb ID",           # rich_text
+    "tmdb_id":         "TMDb ID",           # number veya rich_text
 }
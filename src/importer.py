@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import csv
+import io
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, Optional, Set
+
+from . import checkpoint, snapshot
+from . import letterboxd as lb
+from . import notion as nz
+from .config import NOTION_COLS
+
+# -----------------------------
+# Letterboxd data export (ZIP) -> yeni Notion satırları
+# -----------------------------
+# Sıra önemli: watched.csv film linklerini verir; ratings/diary sadece
+# watched'ta olmayan (nadir) filmleri ekler. diary.csv'deki URI günlük
+# kaydına aittir, bu yüzden tekilleştirme ayrıca ad+yıl ile de yapılır.
+EXPORT_FILES = ("watched.csv", "ratings.csv", "diary.csv")
+BATCH = 50
+
+
+def _film_key(name: str, year: Any) -> str:
+    return f"{(name or '').strip().lower()}|{str(year or '').strip()}"
+
+
+def read_export(path: str) -> Iterator[Dict[str, Any]]:
+    """ZIP'i açmadan CSV'leri satır satır okur; export içinde tekrar edenleri atar."""
+    seen: Set[str] = set()
+    with zipfile.ZipFile(path) as zf:
+        names = {os.path.basename(n): n for n in zf.namelist()}
+        for fname in EXPORT_FILES:
+            member = names.get(fname)
+            if not member:
+                continue
+            with zf.open(member) as raw:
+                reader = csv.DictReader(io.TextIOWrapper(raw, encoding="utf-8-sig", newline=""))
+                for row in reader:
+                    name = (row.get("Name") or "").strip()
+                    uri = (row.get("Letterboxd URI") or "").strip()
+                    if not name or not uri:
+                        continue
+                    key = _film_key(name, row.get("Year"))
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    year = (row.get("Year") or "").strip()
+                    yield {
+                        "name": name,
+                        "year": int(year) if year.isdigit() else None,
+                        "uri": uri,
+                        "key": key,
+                        "source": fname,
+                    }
+
+
+def _existing_keys() -> Set[str]:
+    """
+    Veritabanındaki satırlar: normalize Letterboxd URL'leri (boxd.it kısa linkleri
+    kalıcı eşlemeyle film URL'sine çevrilmiş) + ad|yıl anahtarları. Yılı boş
+    satırlar 'ad|' olarak girer ve sadece adla eşleşir.
+    """
+    keys: Set[str] = set()
+    pages = snapshot.iter_pages() if snapshot.enabled() else nz.iter_all_pages(keys=("letterboxd", "year"))
+    for page in pages:
+        props = page["properties"]
+        url = nz.read_prop(props, NOTION_COLS.get("letterboxd"))
+        if url:
+            keys.add(lb.film_key(url))
+        title = nz.get_page_title(props)
+        if title:
+            year = nz.read_prop(props, NOTION_COLS.get("year"))
+            keys.add(_film_key(title, int(year) if isinstance(year, (int, float)) else None))
+    return keys
+
+
+def run(path: str, state_path: str, workers: int = 3, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Export'taki, veritabanında olmayan filmler için satır oluşturur.
+    Her BATCH sonunda checkpoint yazılır; yarıda kesilirse tekrar çalıştırmak
+    kaldığı yerden devam eder (checkpoint'e girmemiş ama oluşmuş satırlar
+    veritabanı taramasında yakalanır).
+    """
+    state = checkpoint.load(state_path, {"export": None, "done": []})
+    export_id = f"{os.path.abspath(path)}:{os.path.getsize(path)}"
+    if state.get("export") != export_id:
+        state = {"export": export_id, "done": []}
+    done: Set[str] = set(state["done"])
+
+    existing = _existing_keys()
+    stats = {"rows": 0, "existing": 0, "resumed": 0, "created": 0, "failed": 0}
+    print(f"[import] existing rows indexed: {len(existing)}")
+
+    def create(film: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            return nz.create_page(film["name"], film["uri"], film["year"])
+        except Exception as e:
+            print(f"[import] failed {film['name']} ({film['year']}): {e}")
+            return None
+
+    def flush(batch, ex) -> None:
+        for film, page in zip(batch, ex.map(create, batch)):
+            if page is None:
+                stats["failed"] += 1
+                continue
+            stats["created"] += 1
+            snapshot.upsert(page)
+            done.add(film["key"])
+        state["done"] = sorted(done)
+        checkpoint.save(state_path, state)
+        print(f"[import] created={stats['created']} existing={stats['existing']} "
+              f"failed={stats['failed']}", flush=True)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        batch = []
+        for film in read_export(path):
+            stats["rows"] += 1
+            if film["key"] in done:
+                stats["resumed"] += 1
+                continue
+            if (lb.film_key(film["uri"]) in existing or film["key"] in existing
+                    or _film_key(film["name"], None) in existing):
+                stats["existing"] += 1
+                continue
+            if dry_run:
+                print(f"[dry] Would create {film['name']} ({film['year']}) {film['uri']}")
+                continue
+            batch.append(film)
+            if len(batch) >= BATCH:
+                flush(batch, ex)
+                batch = []
+        if batch:
+            flush(batch, ex)
+
+    print(f"[import] Done. rows={stats['rows']} created={stats['created']} "
+          f"existing={stats['existing']} resumed={stats['resumed']} failed={stats['failed']}")
+    return stats
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Dict, IO, List, Optional
+
+from . import metrics
+
+# -----------------------------
+# Çökmeye dayanıklı iş günlüğü (append-only JSONL)
+# -----------------------------
+# <cache-dir>/journal.jsonl, her satır bir durum geçişi:
+#   {"s": "enriched", "id", "t", "title", "payload"}  kaynaklardan veri çekildi
+#                                                     (worker bitirince, yazmadan önce)
+#   {"s": "done",     "id", "t"}                  yazıldı / yazılacak bir şey yok
+# t: sayfanın last_edited_time'ı (yazıldıysa Notion'un döndürdüğü yenisi).
+# Yarıda kalan çalışmadan sonra: "enriched" kalanların payload'ı yeniden yazılır,
+# "done" olanlar (sayfa o zamandan beri düzenlenmediyse) atlanır. Temiz biten
+# çalışma günlüğü sıfırlar.
+
+STATS = {"replayed": 0, "skipped": 0}
+metrics.register("journal", STATS)
+
+_fh: Optional[IO[str]] = None
+_path: Optional[str] = None
+_state: Dict[str, Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+
+def configure(cache_dir: str) -> int:
+    """Günlüğü aç; önceki çalışmadan kalan durumu yükleyip sıkıştır. Dönüş: kayıtlı sayfa sayısı."""
+    global _fh, _path
+    close()
+    os.makedirs(cache_dir, exist_ok=True)
+    _path = os.path.join(cache_dir, "journal.jsonl")
+    _state.clear()
+    if os.path.exists(_path):
+        with open(_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # çökme anında yarım kalan son satır
+                if isinstance(rec, dict) and rec.get("id"):
+                    _state[rec["id"]] = rec
+        # Sayfa başına son durum kalsın; günlük uzun backfill'lerde şişmesin
+        tmp = _path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for rec in _state.values():
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        os.replace(tmp, _path)
+    _fh = open(_path, "a", encoding="utf-8")
+    return len(_state)
+
+
+def close() -> None:
+    global _fh
+    with _lock:
+        if _fh is not None:
+            _fh.close()
+            _fh = None
+
+
+def enabled() -> bool:
+    return _fh is not None
+
+
+def _append(rec: Dict[str, Any], durable: bool = False) -> None:
+    if _fh is None:
+        return
+    with _lock:
+        _state[rec["id"]] = rec
+        _fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        _fh.flush()
+        if durable:
+            os.fsync(_fh.fileno())
+
+
+def enriched(page: Dict[str, Any], title: Optional[str], payload: Dict[str, Any]) -> None:
+    _append({"s": "enriched", "id": page["id"], "t": page.get("last_edited_time"),
+             "title": title, "payload": payload}, durable=True)
+
+
+def done(page_id: str, edited_time: Optional[str]) -> None:
+    # fsync yok: kaybolursa en kötü ihtimalle satır yeniden işlenir (yazma diff'li)
+    _append({"s": "done", "id": page_id, "t": edited_time})
+
+
+def is_done(page: Dict[str, Any]) -> bool:
+    """Bu sürümü (last_edited_time) önceki çalışmada tamamlanmış mı?"""
+    rec = _state.get(page["id"])
+    return bool(rec and rec["s"] == "done" and rec.get("t") == page.get("last_edited_time"))
+
+
+def pending() -> List[Dict[str, Any]]:
+    """Zenginleştirilmiş ama yazılamamış satırlar (payload'larıyla)."""
+    with _lock:
+        return [rec for rec in _state.values() if rec["s"] == "enriched"]
+
+
+def reset() -> None:
+    """Temiz biten çalışma sonrası: günlüğü boşalt."""
+    global _fh
+    if _path is None:
+        return
+    with _lock:
+        if _fh is not None:
+            _fh.close()
+        _state.clear()
+        _fh = open(_path, "w", encoding="utf-8")
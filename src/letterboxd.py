@@ -1,20 +1,39 @@
 # src/letterboxd.py
 from __future__ import annotations
 
+import codecs
+import html as htmllib
 import json
+import os
 import re
+import threading
 from dataclasses import dataclass
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List
 
-import requests
-from bs4 import BeautifulSoup
+from . import cache, metrics, transport
 
 UA = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
     "AppleWebKit/537.36 (KHTML, like Gecko) "
     "Chrome/124.0 Safari/537.36"
 )
-TIMEOUT = 15
+
+# Streaming fetch: sayfa parça parça okunur, parse() için gereken her şey
+# (JSON-LD, og:title, <h1>, IMDb/TMDb linkleri) görülünce bağlantı kesilir.
+STREAM = True
+CHUNK_SIZE = 16 * 1024
+
+# HTML'den alan çıkarma motoru: "soup" (BeautifulSoup, tam DOM), "scan" (hedefli
+# regex tarayıcı, DOM yok), "lxml" (kuruluysa). "auto" -> lxml varsa lxml, yoksa scan.
+ENGINES = ("soup", "scan", "lxml")
+ENGINE = "auto"
+
+# bytes_saved: Content-Length varsa kesin; chunked yanıtlarda tam okunan sayfaların
+# ortalama boyutundan tahmin (henüz tam sayfa okunmadıysa 0 -> alt sınır)
+STATS = {"pages": 0, "early_stops": 0, "full_refetch": 0, "bytes_read": 0, "bytes_saved": 0}
+metrics.register("letterboxd", STATS)
+_stats_lock = threading.Lock()
+_full_pages = [0, 0]  # tam okunan sayfalar: [toplam bayt, adet]
 
 
 @dataclass
@@ -42,33 +61,225 @@ def _normalize_url(url: str) -> str:
     return url
 
 
+def cache_key(url: str) -> str:
+    """Cache anahtarı: şema/host küçük harf, https, sondaki '/' yok."""
+    url = _normalize_url(url)
+    if url.startswith("http://"):
+        url = "https://" + url[len("http://"):]
+    scheme, _, rest = url.partition("://")
+    host, _, path = rest.partition("/")
+    host = host.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = path.split("?")[0].split("#")[0].rstrip("/")
+    return f"https://{host}/{path}"
+
+
+_FILM_RX = re.compile(r"letterboxd\.com/film/([^/?#]+)", re.I)
+
+# boxd.it kısa kod -> https://letterboxd.com/film/<slug>/ (süreç içi katman).
+# Kalıcı kopyası <cache-dir>/boxd_map.jsonl'da (append-only, satır başına
+# {"code", "url"}): cache'ten bağımsız, --no-cache / LRU / --clear-cache silmez.
+_short_map: Dict[str, str] = {}
+_short_path: Optional[str] = None
+_short_lock = threading.Lock()
+
+
+def configure(cache_dir: str) -> None:
+    """Kısa kod dosyasını yükle; çağrılmazsa eşleme sadece bu çalışma için tutulur."""
+    global _short_path
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, "boxd_map.jsonl")
+    loaded: Dict[str, str] = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                    loaded[rec["code"]] = rec["url"]
+                except (ValueError, KeyError, TypeError):
+                    continue  # yarım yazılmış son satır
+    with _short_lock:
+        _short_path = path
+        _short_map.clear()
+        _short_map.update(loaded)
+
+
+def _store_short(code: str, canonical: str) -> None:
+    with _short_lock:
+        if _short_map.get(code) == canonical:
+            return
+        _short_map[code] = canonical
+        if _short_path:
+            with open(_short_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"code": code, "url": canonical}) + "\n")
+
+
+def _short_code(url: str) -> Optional[str]:
+    if "boxd.it/" not in url:
+        return None
+    code = url.split("boxd.it/", 1)[1].split("?")[0].split("#")[0].strip("/")
+    return code or None
+
+
+def _canonical_film_url(url: str) -> Optional[str]:
+    m = _FILM_RX.search(url)
+    return f"https://letterboxd.com/film/{m.group(1)}/" if m else None
+
+
 def _resolve_short(url: str) -> str:
     """
-    boxd.it kısa linklerini gerçek film sayfasına çözer.
-    Diğer URL'leri olduğu gibi döndürür.
+    boxd.it kısa linkini bilinen eşlemeden gerçek film sayfasına çevirir.
+    Eşleme yoksa URL'yi olduğu gibi döndürür; redirect'i _fetch takip eder
+    (ayrı bir GET atılmaz).
     """
     url = _normalize_url(url)
-    if "boxd.it/" not in url:
+    code = _short_code(url)
+    if not code:
         return url
-    # GET ile redirect'i takip et (HEAD bazı CDN'lerde engellenebiliyor)
-    resp = requests.get(url, headers={"User-Agent": UA}, allow_redirects=True, timeout=TIMEOUT)
-    resp.raise_for_status()
-    return resp.url
+    known = _short_map.get(code)
+    if not known:
+        # Eski sürümler eşlemeyi cache'in "boxd" namespace'inde tutuyordu; dosyaya taşı
+        known = cache.get("boxd", code)
+        if known:
+            _store_short(code, known)
+    return known or url
+
+
+def film_key(url: str) -> str:
+    """Karşılaştırma anahtarı: bilinen boxd.it kısa linkleri film URL'sine çevrilir (ağ yok)."""
+    return cache_key(_resolve_short(url))
+
+
+def _remember_short(url: str, final_url: str) -> None:
+    code = _short_code(_normalize_url(url))
+    canonical = _canonical_film_url(final_url)
+    if code and canonical:
+        _store_short(code, canonical)
+
 
+_LDJSON_OPEN_RX = re.compile(r"<script[^>]*application/ld\+json[^>]*>", re.I)
+_SCRIPT_CLOSE_RX = re.compile(r"</script>", re.I)
+_OG_TITLE_TAG_RX = re.compile(r"<meta[^>]*og:title[^>]*>", re.I)
+_H1_CLOSE_RX = re.compile(r"</h1\s*>", re.I)
+# Parça sınırına denk gelen etiket/link için geri dönüp taranan pay
+_OVERLAP = 1024
 
-def _fetch(url: str) -> str:
-    resp = requests.get(url, headers={"User-Agent": UA}, timeout=TIMEOUT)
-    resp.raise_for_status()
-    return resp.text
 
+class _Enough:
+    """
+    Okunan kısım _pick_title/_pick_year/_pick_ids için yeterli mi? Artımlı:
+    her parçada sadece yeni gelen kısım (+ _OVERLAP) taranır, baştan değil.
+    """
+
+    def __init__(self) -> None:
+        self.found = {"imdb": False, "tmdb": False, "og": False, "h1": False, "movie": False}
+        self._pos = 0                          # bu konuma kadar tarandı
+        self._ld: Optional[Tuple[int, int]] = None  # kapanmamış ld+json: (içerik başı, kapanış arama konumu)
+
+    def feed(self, html: str) -> bool:
+        start = max(0, self._pos - _OVERLAP)
+        f = self.found
+        for key, rx in (("imdb", _IMDB_RX), ("tmdb", _TMDB_RX), ("og", _OG_TITLE_TAG_RX), ("h1", _H1_CLOSE_RX)):
+            if not f[key] and rx.search(html, start):
+                f[key] = True
+        pos = start
+        while not f["movie"]:
+            if self._ld is None:
+                m = _LDJSON_OPEN_RX.search(html, pos)
+                if not m:
+                    break
+                self._ld = (m.end(), m.end())
+            body, search_from = self._ld
+            end = _SCRIPT_CLOSE_RX.search(html, search_from)
+            if not end:
+                # Blok sonraki parçalarda kapanacak; oradan devam
+                self._ld = (body, max(body, len(html) - len("</script>")))
+                break
+            self._ld = None
+            f["movie"] = "movie" in html[body:end.start()].lower()
+            pos = end.end()
+        self._pos = len(html)
+        return all(f.values())
+
+
+def _have_enough(html: str) -> bool:
+    return _Enough().feed(html)
+
+
+def _count(**kw: int) -> None:
+    with _stats_lock:
+        for k, v in kw.items():
+            STATS[k] += v
 
-def _extract_jsonld(soup: BeautifulSoup) -> Optional[dict]:
+
+def _remember_full_size(n: int) -> None:
+    if n > 0:
+        with _stats_lock:
+            _full_pages[0] += n
+            _full_pages[1] += 1
+
+
+def _saved_bytes(content_length: Optional[str], wire: int) -> int:
+    """Erken kesilen sayfada okunmayan bayt: Content-Length, yoksa tam sayfa ortalaması."""
+    if content_length and content_length.isdigit():
+        return max(0, int(content_length) - wire)
+    with _stats_lock:
+        total, n = _full_pages
+    return max(0, total // n - wire) if n else 0
+
+
+@metrics.timed("letterboxd.fetch")
+def _fetch(url: str, stream: Optional[bool] = None) -> Tuple[str, str, bool]:
+    """
+    Sayfayı indirir (redirect'leri takip ederek); (son URL, html, erken_kesildi_mi) döndürür.
+    stream=True iken gövde iter_content ile okunur ve gereken kısım gelince durulur.
+    """
+    if stream is None:
+        stream = STREAM
+    resp = transport.get(url, headers={"User-Agent": UA}, allow_redirects=True, stream=stream)
+    try:
+        resp.raise_for_status()
+        if not stream:
+            _count(pages=1, bytes_read=len(resp.content))
+            _remember_full_size(len(resp.content))
+            return resp.url, resp.text, False
+
+        decoder = codecs.getincrementaldecoder(resp.encoding or "utf-8")(errors="replace")
+        enough = _Enough()
+        html = ""
+        stopped = False
+        for chunk in resp.iter_content(CHUNK_SIZE):
+            html += decoder.decode(chunk)
+            if enough.feed(html):
+                stopped = True
+                break
+        html += decoder.decode(b"", final=True)
+
+        # Kablodan okunan (sıkıştırılmış olabilir) bayt
+        wire = resp.raw.tell() if hasattr(resp.raw, "tell") else 0
+        saved = _saved_bytes(resp.headers.get("Content-Length"), wire) if stopped else 0
+        if not stopped:
+            _remember_full_size(wire)
+        _count(pages=1, early_stops=int(stopped), bytes_read=wire, bytes_saved=saved)
+        metrics.incr(f"http.{transport._host(resp.url)}.bytes", wire)
+        return resp.url, html, stopped
+    finally:
+        resp.close()
+
+
+_CDATA_RX = re.compile(r"/\*\s*<!\[CDATA\[\s*\*/|/\*\s*\]\]>\s*\*/")
+
+
+def _movie_from_jsonld(blocks: List[str]) -> Optional[dict]:
     """
     Letterboxd film sayfalarında Movie tipinde JSON-LD bulunur.
+    blocks: <script type="application/ld+json"> içerikleri (sayfa sırasıyla).
     """
-    for tag in soup.find_all("script", attrs={"type": "application/ld+json"}):
+    for text in blocks:
         try:
-            data = json.loads(tag.string or "")
+            # Letterboxd bloğu "/* <![CDATA[ */ ... /* ]]> */" ile sarıyor
+            data = json.loads(_CDATA_RX.sub("", text or ""))
         except Exception:
             continue
         # Bazı sayfalarda liste, bazılarında tek obje geliyor
@@ -84,12 +295,96 @@ def _extract_jsonld(soup: BeautifulSoup) -> Optional[dict]:
     return None
 
 
+# -----------------------------
+# Extraction engines: html -> (JSON-LD blokları, og:title content, <h1> metni)
+# -----------------------------
+Extracted = Tuple[List[str], Optional[str], Optional[str]]
+
+
+def _extract_soup(html: str) -> Extracted:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    blocks = [tag.string or "" for tag in
+              soup.find_all("script", attrs={"type": "application/ld+json"})]
+    meta_og = soup.find("meta", attrs={"property": "og:title"})
+    og_title = meta_og.get("content") if meta_og else None
+    h1 = soup.find("h1")
+    h1_text = h1.get_text(" ", strip=True) if h1 else None
+    return blocks, og_title, (h1_text or None)
+
+
+_SCRIPT_RX = re.compile(r"<script\b([^>]*)>(.*?)</script\s*>", re.I | re.S)
+_META_RX = re.compile(r"<meta\b([^>]*)>", re.I)
+_H1_RX = re.compile(r"<h1\b[^>]*>(.*?)</h1\s*>", re.I | re.S)
+_ATTR_RX = re.compile(r"""([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+_COMMENT_RX = re.compile(r"<!--.*?-->", re.S)
+_TAG_RX = re.compile(r"<[^>]*>")
+
+
+def _attrs(raw: str) -> Dict[str, str]:
+    out: Dict[str, str] = {}
+    for m in _ATTR_RX.finditer(raw):
+        name = m.group(1).lower()
+        if name not in out:
+            val = next((g for g in m.group(2, 3, 4) if g is not None), "")
+            out[name] = htmllib.unescape(val)
+    return out
+
+
+def _extract_scan(html: str) -> Extracted:
+    """DOM kurmadan sadece gereken etiketleri regex ile tarar."""
+    blocks = [m.group(2) for m in _SCRIPT_RX.finditer(html)
+              if _attrs(m.group(1)).get("type") == "application/ld+json"]
+    og_title = None
+    for m in _META_RX.finditer(html):
+        a = _attrs(m.group(1))
+        if a.get("property") == "og:title":
+            og_title = a.get("content")
+            break
+    h1_text = None
+    m = _H1_RX.search(html)
+    if m:
+        inner = _COMMENT_RX.sub("", m.group(1))
+        pieces = (htmllib.unescape(p).strip() for p in _TAG_RX.split(inner))
+        h1_text = " ".join(p for p in pieces if p) or None
+    return blocks, og_title, h1_text
+
+
+def _extract_lxml(html: str) -> Extracted:
+    import lxml.html
+
+    doc = lxml.html.fromstring(html)
+    blocks = [el.text or "" for el in doc.xpath('//script[@type="application/ld+json"]')]
+    metas = doc.xpath('//meta[@property="og:title"]')
+    og_title = metas[0].get("content") if metas else None
+    h1s = doc.xpath("//h1")
+    h1_text = None
+    if h1s:
+        h1_text = " ".join(t.strip() for t in h1s[0].itertext() if t.strip()) or None
+    return blocks, og_title, h1_text
+
+
+_EXTRACTORS = {"soup": _extract_soup, "scan": _extract_scan, "lxml": _extract_lxml}
+
+
+def resolve_engine(engine: Optional[str] = None) -> str:
+    engine = engine or ENGINE
+    if engine != "auto":
+        return engine
+    try:
+        import lxml.html  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "scan"
+
+
 _IMDB_RX = re.compile(r"imdb\.com/title/(tt\d+)", re.I)
 _TMDB_RX = re.compile(r"themoviedb\.org/movie/(\d+)", re.I)
 _YEAR_RX = re.compile(r"\b(19\d{2}|20\d{2})\b")
 
 
-def _pick_year(jsonld: Optional[dict], soup: BeautifulSoup) -> Optional[int]:
+def _pick_year(jsonld: Optional[dict], og_title: Optional[str], h1_text: Optional[str]) -> Optional[int]:
     # 1) JSON-LD: datePublished ya da releasedEvent.startDate
     if jsonld:
         date = jsonld.get("datePublished")
@@ -103,42 +398,37 @@ def _pick_year(jsonld: Optional[dict], soup: BeautifulSoup) -> Optional[int]:
                     return int(_YEAR_RX.search(sd).group(1))
     # 2) Sayfadaki meta ve görünen yıl
     #   Örn: <meta property="og:title" content="Film Name (2024) – Letterboxd">
-    meta_og = soup.find("meta", attrs={"property": "og:title"})
-    if meta_og and meta_og.get("content"):
-        m = _YEAR_RX.search(meta_og["content"])
+    if og_title:
+        m = _YEAR_RX.search(og_title)
         if m:
             return int(m.group(1))
     # 3) Başlık H1 vb.
-    h1 = soup.find("h1")
-    if h1 and h1.get_text(strip=True):
-        m = _YEAR_RX.search(h1.get_text(" ", strip=True))
+    if h1_text:
+        m = _YEAR_RX.search(h1_text)
         if m:
             return int(m.group(1))
     return None
 
 
-def _pick_title(jsonld: Optional[dict], soup: BeautifulSoup) -> Optional[str]:
+def _pick_title(jsonld: Optional[dict], og_title: Optional[str], h1_text: Optional[str]) -> Optional[str]:
     if jsonld:
         name = jsonld.get("name")
         if isinstance(name, str) and name.strip():
             return name.strip()
-    meta_og = soup.find("meta", attrs={"property": "og:title"})
-    if meta_og and meta_og.get("content"):
+    if og_title:
         # "Film Name (2024) – Letterboxd" tipini sadeleştir
-        txt = meta_og["content"].split("–")[0].strip()
+        txt = og_title.split("–")[0].strip()
         if txt.endswith(")") and "(" in txt:
             txt = txt[: txt.rfind("(")].strip()
         if txt:
             return txt
     # H1 fallback
-    h1 = soup.find("h1")
-    if h1:
-        txt = h1.get_text(" ", strip=True)
-        if txt:
-            # Sonundaki (YYYY) varsa at
-            if txt.endswith(")") and "(" in txt:
-                txt = txt[: txt.rfind("(")].strip()
-            return txt
+    if h1_text:
+        txt = h1_text
+        # Sonundaki (YYYY) varsa at
+        if txt.endswith(")") and "(" in txt:
+            txt = txt[: txt.rfind("(")].strip()
+        return txt
     return None
 
 
@@ -179,27 +469,36 @@ def _pick_ids(jsonld: Optional[dict], html: str) -> Tuple[Optional[str], Optiona
     return imdb_id, tmdb_id
 
 
-def parse(url: str) -> Dict[str, Any]:
+@metrics.timed("letterboxd.parse")
+def parse(url: str, engine: Optional[str] = None) -> Dict[str, Any]:
     """
     Letterboxd linkinden meta çıkarır.
     Kısa link (boxd.it/...) verilebilir; otomatik çözer.
     Dönüş: {"title", "year", "imdb_id", "tmdb_id"}
     """
-    try:
-        real_url = _resolve_short(url)
-    except Exception:
-        # Çözülemezse verilen URL ile devam etmeyi dene
-        real_url = _normalize_url(url)
+    # boxd.it ise tek GET: redirect takip edilir ve aynı yanıtın gövdesi kullanılır
+    final_url, html, partial = _fetch(_resolve_short(url))
+    _remember_short(url, final_url)
+    meta = parse_html(html, engine)
+    if partial and not meta.title:
+        # Erken kesilen gövde yetmedi; tam sayfayı indir
+        _count(full_refetch=1)
+        _, html, _ = _fetch(final_url, stream=False)
+        meta = parse_html(html, engine)
+    return meta.to_dict()
 
-    html = _fetch(real_url)
-    soup = BeautifulSoup(html, "html.parser")
-    jsonld = _extract_jsonld(soup)
+
+@metrics.timed("letterboxd.extract")
+def parse_html(html: str, engine: Optional[str] = None) -> LbMeta:
+    """İndirilmiş film sayfası HTML'inden LbMeta çıkarır (ağ yok)."""
+    blocks, og_title, h1_text = _EXTRACTORS[resolve_engine(engine)](html)
+    jsonld = _movie_from_jsonld(blocks)
 
     meta = LbMeta()
-    meta.title = _pick_title(jsonld, soup)
-    meta.year = _pick_year(jsonld, soup)
+    meta.title = _pick_title(jsonld, og_title, h1_text)
+    meta.year = _pick_year(jsonld, og_title, h1_text)
     meta.imdb_id, meta.tmdb_id = _pick_ids(jsonld, html)
-    return meta.to_dict()
+    return meta
 
 
 # Kullanışlı yardımcılar (main.py bazı yerlerde doğrudan kullanabilir)
@@ -2,12 +2,22 @@
 from __future__ import annotations
 
 import argparse
+import itertools
+import os
+import queue
+import sys
+import threading
 import time
-from typing import Dict, Any, Optional
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Any, List, Optional
 
+from . import cache, checkpoint, importer, journal, metrics, snapshot
 from . import notion as nz
 from . import letterboxd as lb
-from . import omdb, tmdb
+from . import omdb, tmdb, tmdb_index, transport
+from . import plan as planner
 from .config import NOTION_COLS
 
 
@@ -37,7 +47,7 @@ def _payload_from_omdb(d: Dict[str, Any]) -> Dict[str, Any]:
         "writer": d.get("writer"),
         "cinematography": d.get("cinematography"),
         "poster": d.get("poster"),
-        "original_title": d.get("original_title") or d.get("title"),
+        "original_title": d.get("original_title"),
         "synopsis": d.get("plot") or d.get("synopsis"),
         "countries": d.get("countries"),
         "languages": d.get("languages"),
@@ -67,85 +77,92 @@ def _payload_from_tmdb(d: Dict[str, Any]) -> Dict[str, Any]:
 
 
 # -----------------------------
-# Main
+# Row enrichment (Letterboxd -> OMDb -> TMDb)
 # -----------------------------
-def main():
-    ap = argparse.ArgumentParser("Notion × Letterboxd sync")
-    ap.add_argument("--limit", type=int, default=0, help="Eksik alan taramada işlenecek satır sayısı (0=limitsiz)")
-    ap.add_argument("--dry-run", action="store_true", help="Notion'a yazmadan sadece logla")
-    ap.add_argument(
-        "--set-covers",
-        action="store_true",
-        help="Tüm sayfalarda Backdrop URL'sini sayfa cover'ı olarak ayarla (tek seferlik)",
-    )
-    ap.add_argument("--recent-hours", type=int, default=0,
-                    help="Son N saatte düzenlenen sayfaları dene (eksik alan şartı yok). 0=kapalı")
-    ap.add_argument("--recent-limit", type=int, default=50,
-                    help="--recent-hours açıkken maksimum sayfa sayısı (0=limitsiz)")
+def _source_keys(imdb_id: Optional[str], tmdb_id: Any,
+                 title: Optional[str] = None, year: Any = None) -> List[str]:
+    """Kaynak payload'ları için cache anahtarları (ID'ler önce)."""
+    keys = []
+    if imdb_id:
+        keys.append(f"imdb:{imdb_id}")
+    if tmdb_id:
+        keys.append(f"tmdb:{tmdb_id}")
+    if title:
+        keys.append(f"title:{title.strip().lower()}:{year or ''}")
+    return keys
 
-    args = ap.parse_args()
 
-    print("[debug] starting...")
+def _cached(ns: str, keys: List[str], fetch: Callable[[], Optional[Dict[str, Any]]],
+            usable: Callable[[Dict[str, Any]], bool] = lambda hit: True):
+    """Anahtarlardan biri cache'te (ve usable) ise onu döndür; yoksa fetch() edip tüm anahtarlara yaz."""
+    for k in keys:
+        hit = cache.get(ns, k)
+        if hit is not None and usable(hit):
+            return hit
+    data = fetch()
+    if data:
+        for k in keys + _source_keys(data.get("imdb_id"), data.get("tmdb_id")):
+            cache.put(ns, k, data)
+    return data
 
-    # --- Tek seferlik kapak düzeltme modu ---
-    if args.set_covers:
-        print("[cover] Setting missing covers from Backdrop...", flush=True)
-        scanned = 0
-        fixed = 0
-        for page in nz.iter_all_pages():
-            scanned += 1
-            props = page["properties"]
-            backdrop = nz.read_prop(props, NOTION_COLS.get("backdrop"))
-            current_cover = page.get("cover")
-            if backdrop and current_cover is None:
-                if not args.dry_run:
-                    nz.update_cover(page["id"], backdrop)
-                fixed += 1
-                time.sleep(0.15)
-        print(f"[cover] Done. Scanned={scanned}, set={fixed}")
-        return
 
-    # --- Hangi sayfaları işleyeceğiz? ---
-    pages = None
-    if args.recent_hours and args.recent_hours > 0:
-        pages = nz.iter_recent_pages(hours=args.recent_hours, limit=args.recent_limit)
-        print(f"[debug] fetched {len(pages)} recent pages")
-        # Sadece Letterboxd linki olanları bırak
-        filtered = []
-        for p in pages:
-            props = p["properties"]
-            if (nz.read_prop(props, NOTION_COLS.get("letterboxd")) or
-                nz.find_letterboxd_url(props)):
-                filtered.append(p)
-        pages = filtered
-    else:
-        pages = nz.iter_pages_needing_fill(limit=args.limit)
-        print(f"[debug] fetched {len(pages)} rows")
+def _lb_meta(lb_url: str) -> Optional[Dict[str, Any]]:
+    key = lb.cache_key(lb_url)
+    meta = cache.get("lb", key)
+    if meta is not None:
+        return meta
+    meta = lb.parse(lb_url)
+    if meta and (meta.get("title") or meta.get("imdb_id") or meta.get("tmdb_id")):
+        cache.put("lb", key, meta)
+    return meta
 
-    updated = 0
 
-    for idx, page in enumerate(pages, start=1):
-        props = page["properties"]
-        pid = page["id"]
+@dataclass
+class _Row:
+    idx: int
+    page: Dict[str, Any]
+    lb_url: str
+    title: Optional[str]
+    payload: Dict[str, Any]
+    complete: bool = False   # doldurulacak alan yoktu, hiçbir kaynak çağrılmadı
+    avoided: int = 0         # plan sayesinde yapılmayan kaynak çağrıları
 
-        # Letterboxd link
-        lb_url = (nz.read_prop(props, NOTION_COLS.get("letterboxd"))
-                  or nz.find_letterboxd_url(props))
-        if not lb_url:
-            continue
 
-        # Tahmini başlık & yıl + ID'ler
-        title_guess = nz.get_page_title(props) or None
-        year_guess = None
-        imdb_id = None
-        tmdb_id = None
+@metrics.timed("stage.enrich")
+def _enrich_row(idx: int, page: Dict[str, Any]) -> Optional[_Row]:
+    """Tek satır için kaynaklardan veri çeker; Notion'a yazmaz (thread-safe)."""
+    props = page["properties"]
+
+    # Letterboxd link
+    lb_url = (nz.read_prop(props, NOTION_COLS.get("letterboxd"))
+              or nz.find_letterboxd_url(props))
+    if not lb_url:
+        return None
+
+    # Hangi alanlar boş, hangi çağrılar gerekli?
+    plan = planner.plan_row(props)
+
+    # Tahmini başlık & yıl + ID'ler (sayfada kayıtlıysa onlar)
+    title_guess = nz.get_page_title(props) or None
+    year_guess = nz.read_prop(props, NOTION_COLS.get("year"))
+    year_guess = int(year_guess) if isinstance(year_guess, (int, float)) else None
+    imdb_id = plan.imdb_id
+    tmdb_id = plan.tmdb_id
+
+    if not plan.fields:
+        return _Row(idx=idx, page=page, lb_url=lb_url, title=title_guess, payload={},
+                    complete=True, avoided=planner.FULL_CALLS)
 
-        meta = None
+    avoided = 0
+    meta = None
+    if plan.needs_scrape:
         # Önce güçlü parser'ın varsa onu dene
         try:
             if hasattr(lb, "parse"):
-                meta = lb.parse(lb_url)
+                with metrics.timer("stage.scrape"):
+                    meta = _lb_meta(lb_url)
         except Exception:
+            metrics.incr("stage.scrape.errors")
             meta = None
 
         # Basit slug tahmini (from_boxd) fallback
@@ -155,60 +172,683 @@ def main():
                     meta = lb.from_boxd(lb_url)
             except Exception:
                 meta = None
+    else:
+        avoided += 1
+
+    if isinstance(meta, dict):
+        title_guess = meta.get("title") or title_guess
+        year_guess  = meta.get("year")  or year_guess
+        imdb_id     = meta.get("imdb_id") or imdb_id
+        tmdb_id     = meta.get("tmdb_id") or tmdb_id
 
-        if isinstance(meta, dict):
-            title_guess = meta.get("title") or title_guess
-            year_guess  = meta.get("year")  or year_guess
-            imdb_id     = meta.get("imdb_id") or imdb_id
-            tmdb_id     = meta.get("tmdb_id") or tmdb_id
+    # Kaynaklardan veri çek
+    payload: Dict[str, Any] = {}
 
-        print(f"[debug] row {idx}: title='{title_guess}' url='{lb_url}'")
+    keys = _source_keys(imdb_id, tmdb_id, title_guess, year_guess)
 
-        # Kaynaklardan veri çek
-        payload: Dict[str, Any] = {}
+    # 1) OMDb (ID varsa ID ile, yoksa başlık+yıl) -- sadece OMDb'nin verebileceği alan eksikse
+    def fetch_omdb():
+        if imdb_id and hasattr(omdb, "get_by_imdb"):
+            return omdb.get_by_imdb(imdb_id)
+        elif hasattr(omdb, "get_by_title") and title_guess:
+            return omdb.get_by_title(title_guess, year_guess)
+        return None
 
-        # 1) OMDb (ID varsa ID ile, yoksa başlık+yıl)
-        omdb_data = None
+    omdb_data = None
+    if plan.needs_omdb:
         try:
-            if imdb_id and hasattr(omdb, "get_by_imdb"):
-                omdb_data = omdb.get_by_imdb(imdb_id)
-            elif hasattr(omdb, "get_by_title") and title_guess:
-                omdb_data = omdb.get_by_title(title_guess, year_guess)
+            with metrics.timer("stage.omdb"):
+                omdb_data = _cached("omdb", keys, fetch_omdb)
         except Exception:
+            metrics.incr("stage.omdb.errors")
             omdb_data = None
+    else:
+        avoided += 1
+
+    if omdb_data:
+        _merge_payload(payload, _payload_from_omdb(omdb_data))
+        imdb_id = imdb_id or omdb_data.get("imdb_id")
+
+    # 2) TMDb: hâlâ eksik alan varsa, sadece gereken alt kaynaklarla
+    missing = plan.fields - set(payload)
+    tmdb_data = None
+    if missing:
+        parts = plan.tmdb_parts(missing)
+        avoided += len(planner.APPENDABLE) - len(parts)
 
-        if omdb_data:
-            _merge_payload(payload, _payload_from_omdb(omdb_data))
+        def fetch_tmdb():
+            if tmdb_id and hasattr(tmdb, "get_by_id"):
+                return tmdb.get_by_id(tmdb_id, parts=parts)
+            elif imdb_id and hasattr(tmdb, "get_by_imdb"):
+                return tmdb.get_by_imdb(imdb_id, parts=parts)
+            elif hasattr(tmdb, "get_by_title") and title_guess:
+                return tmdb.get_by_title(title_guess, year_guess, parts=parts)
+            return None
 
-        # 2) TMDb fallback (ID varsa ID ile, yoksa başlık+yıl)
-        needs_core = any(k not in payload for k in (
-            "year", "director", "writer", "cinematography", "runtime", "poster", "backdrop"
-        ))
-        if not payload or needs_core:
+        def has_parts(hit):
+            return set(parts) <= set(hit.get("_parts") or ("details",) + tmdb.FULL_PARTS)
+
+        try:
+            with metrics.timer("stage.tmdb"):
+                tmdb_data = _cached("tmdb", keys, fetch_tmdb, usable=has_parts)
+        except Exception:
+            metrics.incr("stage.tmdb.errors")
             tmdb_data = None
+
+        if tmdb_data:
+            _merge_payload(payload, _payload_from_tmdb(tmdb_data))
+    else:
+        avoided += 1 + len(planner.APPENDABLE)
+
+    # Sadece boş alanlar yazılır; bulunan ID'ler boş ID kolonlarına geri yazılır
+    payload = {k: v for k, v in payload.items() if k in plan.fields}
+    if payload:
+        found = {"imdb_id": imdb_id or (tmdb_data or {}).get("imdb_id"),
+                 "tmdb_id": tmdb_id or (tmdb_data or {}).get("tmdb_id")}
+        for k in plan.write_ids:
+            if found[k]:
+                payload[k] = found[k]
+
+    return _Row(idx=idx, page=page, lb_url=lb_url, title=title_guess, payload=payload,
+                avoided=avoided)
+
+
+def _enrich_journaled(idx: int, page: Dict[str, Any]) -> Optional[_Row]:
+    """
+    _enrich_row + payload'ı hemen günlüğe yaz (worker thread'inde): pencerede
+    yazılmayı bekleyen satırlar da çökmeden sonra kaynaklara gitmeden yazılır.
+    """
+    row = _enrich_row(idx, page)
+    if row is not None and row.payload and not row.complete:
+        journal.enriched(row.page, row.title, row.payload)
+    return row
+
+
+def _iter_enriched(pages, workers: int = 1):
+    """
+    Satırları zenginleştirip GİRİŞ SIRASIYLA döndürür.
+    workers > 1 ise fetch aşamaları thread havuzunda koşar; pencere
+    (workers*2) ile sınırlı olduğundan bellekte az sayıda satır bekler.
+    """
+    if workers <= 1:
+        for idx, page in enumerate(pages, start=1):
+            yield _enrich_journaled(idx, page)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        window: Deque[Future] = deque()
+        for idx, page in enumerate(pages, start=1):
+            window.append(ex.submit(_enrich_journaled, idx, page))
+            if len(window) >= workers * 2:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+
+# -----------------------------
+# Page pipeline
+# -----------------------------
+PREFETCH = 200  # Notion'dan önden çekilip kuyrukta bekleyebilecek en fazla sayfa
+_END = object()
+
+
+def _counted(pages, scan: Dict[str, Any]):
+    for p in pages:
+        scan["fetched"] += 1
+        yield p
+
+
+def _prefetch(pages, size: int = PREFETCH):
+    """
+    pages iterator'ını arka plan thread'inde tüketir; sınırlı kuyruk sayesinde
+    sorgunun bir sonraki sayfası, önceki satırlar işlenirken çekilir.
+    Üreticideki istisna tüketiciye aynen iletilir.
+    """
+    q: "queue.Queue" = queue.Queue(maxsize=size)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
             try:
-                if tmdb_id and hasattr(tmdb, "get_by_id"):
-                    tmdb_data = tmdb.get_by_id(tmdb_id)
-                elif hasattr(tmdb, "get_by_title") and title_guess:
-                    tmdb_data = tmdb.get_by_title(title_guess, year_guess)
-            except Exception:
-                tmdb_data = None
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run():
+        try:
+            for p in pages:
+                if not put(p):
+                    return
+        except BaseException as e:
+            put(_Failure(e))
+            return
+        put(_END)
 
-            if tmdb_data:
-                _merge_payload(payload, _payload_from_tmdb(tmdb_data))
+    t = threading.Thread(target=run, name="notion-prefetch", daemon=True)
+    t.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _END:
+                return
+            if isinstance(item, _Failure):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
 
-        if not payload:
-            print(f"[skip] {title_guess or 'Unknown'}: no data found")
+
+class _Failure:
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+
+def _has_letterboxd(page: Dict[str, Any]) -> bool:
+    props = page["properties"]
+    return bool(nz.read_prop(props, NOTION_COLS.get("letterboxd")) or
+                nz.find_letterboxd_url(props))
+
+
+def _journal_filter(pages, scan: Dict[str, Any]):
+    """Önceki (yarıda kalan) çalışmada tamamlanmış sayfaları atla."""
+    for p in pages:
+        if journal.is_done(p):
+            scan["journal_skipped"] += 1
             continue
+        yield p
+
+
+def _replay_journal() -> int:
+    """
+    Zenginleştirilmiş ama yazılamamış satırları günlükteki payload'la yaz
+    (kaynaklara tekrar gidilmez). Sayfa güncel haliyle okunur; o arada dolmuş
+    alanlar yazılmaz. Dönüş: yazılan sayfa sayısı.
+    """
+    written = 0
+    for rec in journal.pending():
+        try:
+            page = nz.retrieve_page(rec["id"])
+        except Exception as e:
+            if nz.is_gone(e):
+                page = {"id": rec["id"], "archived": True}
+            else:
+                print(f"[journal] cannot load {rec.get('title') or rec['id']}: {e}")
+                continue
+        if page.get("archived") or page.get("in_trash"):
+            # Kopyadan da düşür; yoksa sonraki çalışmalar aynı sayfayı yazmaya çalışır
+            snapshot.upsert(page)
+            journal.done(rec["id"], rec.get("t"))
+            print(f"[gone] {rec.get('title') or rec['id']}: archived or deleted in Notion")
+            continue
+        plan = planner.plan_row(page["properties"])
+        payload = {k: v for k, v in rec["payload"].items() if k in plan.fields or k in plan.write_ids}
+        edited = None
+        if payload:
+            edited = nz.update_page(page["id"], payload, existing_props=page["properties"],
+                                    existing_cover=page.get("cover"))
+            snapshot.upsert(edited)
+        journal.done(page["id"], (edited or page).get("last_edited_time"))
+        journal.STATS["replayed"] += 1
+        print(f"[journal] replayed {rec.get('title') or page['id']}: {sorted(payload) or 'nothing left'}")
+        written += int(edited is not None)
+    return written
+
+
+# -----------------------------
+# Incremental checkpoint
+# -----------------------------
+# watermark: işlenen en büyük last_edited_time
+# done: {page_id: last_edited_time} -> bu sürüm zaten işlendi (kendi yazdıklarımız
+#       dahil: yazmadan sonra Notion'un döndürdüğü last_edited_time saklanır)
+def _inc_mark(inc: Dict[str, Any], page: Dict[str, Any], edited: Optional[Dict[str, Any]] = None) -> None:
+    seen = page.get("last_edited_time")
+    inc["done"][page["id"]] = (edited or page).get("last_edited_time")
+    if seen and (not inc["watermark"] or seen > inc["watermark"]):
+        inc["watermark"] = seen
+
+
+def _select_incremental(inc: Dict[str, Any], fetched, scan: Dict[str, Any]):
+    """Bu sürümü zaten işlenmiş ya da Letterboxd linki olmayan sayfaları ele."""
+    for p in _counted(fetched, scan):
+        seen = p.get("last_edited_time")
+        if seen and (not scan["max_seen"] or seen > scan["max_seen"]):
+            scan["max_seen"] = seen
+        if inc["done"].get(p["id"]) == seen:
+            scan["already_done"] += 1
+            continue
+        if not _has_letterboxd(p):
+            inc["done"][p["id"]] = seen
+            continue
+        yield p
+
+
+def _inc_prune(inc: Dict[str, Any]) -> None:
+    """Watermark'tan eski kayıtlar bir daha sorguya giremez; at."""
+    wm = inc["watermark"]
+    if wm:
+        inc["done"] = {pid: t for pid, t in inc["done"].items() if t and t >= wm}
 
-        # Notion update
+
+def _print_notion_stats() -> None:
+    b = nz.BUCKET
+    print(f"[notion] calls={b.calls} rate_limited={b.rate_limited} throttled={b.throttled_s:.1f}s")
+
+
+# -----------------------------
+# Bulk cover mode (--set-covers)
+# -----------------------------
+# Checkpoint (<cache-dir>/covers.json): işlenen sorgu sayfasının imleci + o sayfada
+# tamamlanan ID'ler. Kapak konan sayfalar zaten aday olmaktan çıktığı için imleç
+# geçersiz olsa bile baştan taramak güvenlidir; checkpoint sadece tekrar taramayı keser.
+COVER_KEYS = ("backdrop", "letterboxd", "imdb_id", "tmdb_id")
+COVER_PROGRESS_S = 10.0
+
+
+def _cached_backdrop(props: Dict[str, Any]) -> Optional[str]:
+    """Backdrop kolonu boşken: Letterboxd meta / sayfadaki ID -> TMDb cache'i (ağ yok)."""
+    lb_url = nz.read_prop(props, NOTION_COLS.get("letterboxd"))
+    meta = cache.get("lb", lb.cache_key(lb_url)) if lb_url else None
+    p = planner.plan_row(props)
+    imdb_id = (meta or {}).get("imdb_id") or p.imdb_id
+    tmdb_id = (meta or {}).get("tmdb_id") or p.tmdb_id
+    for k in _source_keys(imdb_id, tmdb_id):
+        hit = cache.get("tmdb", k)
+        if hit and hit.get("backdrop"):
+            return hit["backdrop"]
+    return None
+
+
+def _cover_target(page: Dict[str, Any]):
+    """(kapak URL'si, cache'ten mi) -- kapağı olan ya da kaynağı olmayan sayfa: (None, False)."""
+    if page.get("cover") is not None:
+        return None, False
+    props = page["properties"]
+    backdrop = nz.read_prop(props, NOTION_COLS.get("backdrop"))
+    if backdrop:
+        return backdrop, False
+    cached = _cached_backdrop(props)
+    return cached, bool(cached)
+
+
+def _write_cover(page: Dict[str, Any], url: str, from_cache: bool) -> Optional[Dict[str, Any]]:
+    if from_cache:
+        # Boş Backdrop kolonu da aynı çağrıda doldurulur (update_page cover'ı da ayarlar)
+        return nz.update_page(page["id"], {"backdrop": url}, existing_props=page["properties"],
+                              existing_cover=page.get("cover"))
+    return nz.update_cover(page["id"], url)
+
+
+def _cover_batches(cursor: Optional[str]):
+    """(sayfalar, sonraki imleç); kayıtlı imleç reddedilirse baştan başlar."""
+    if snapshot.enabled():
+        batch: List[Dict[str, Any]] = []
+        for page in snapshot.iter_pages():
+            batch.append(page)
+            if len(batch) >= 100:
+                yield batch, None
+                batch = []
+        yield batch, None
+        return
+    it = nz.iter_page_batches(keys=COVER_KEYS, start_cursor=cursor)
+    try:
+        first = next(it)
+    except StopIteration:
+        return
+    except Exception as e:
+        if not cursor:
+            raise
+        print(f"[cover] saved cursor rejected ({e}); restarting from the first page")
+        yield from nz.iter_page_batches(keys=COVER_KEYS)
+        return
+    yield first
+    yield from it
+
+
+def _fmt_eta(secs: float) -> str:
+    m, s = divmod(int(secs), 60)
+    h, m = divmod(m, 60)
+    return f"{h}h{m:02d}m" if h else f"{m}m{s:02d}s"
+
+
+def _set_covers(args: argparse.Namespace) -> None:
+    state_path = os.path.join(args.cache_dir, "covers.json")
+    fresh = {"cursor": None, "done": [], "scanned": 0, "set": 0, "last_total": None}
+    state = checkpoint.load(state_path, fresh)
+    if snapshot.enabled():
+        # Yerel kopyada imleç yok; tarama ucuz, kapak konanlar zaten elenir
+        state = {**fresh, "last_total": state.get("last_total")}
+    elif not state["cursor"] and state["scanned"]:
+        # İmleç yoksa sorgu baştan başlar; eski sayaç ilerleme/ETA'yı kaydırmasın
+        state["scanned"] = 0
+    if state["cursor"] or state["done"]:
+        print(f"[cover] resuming after {state['scanned']} scanned pages", flush=True)
+    total = snapshot.count() if snapshot.enabled() else state.get("last_total")
+    print(f"[cover] Setting missing covers from Backdrop (or cached TMDb backdrop)... "
+          f"total={total or '?'}", flush=True)
+
+    done = set(state["done"])
+    stats = {"scanned": state["scanned"], "set": state["set"], "from_cache": 0, "failed": 0}
+    resumed_at = stats["scanned"]
+    t0 = last_report = time.monotonic()
+
+    def save() -> None:
+        # scanned: imleçten önceki sayfalar (yarım sorgu sayfası devamda yeniden taranır)
         if args.dry_run:
-            print(f"[dry] Would update {title_guess or 'Unknown'}: {payload}")
+            return
+        checkpoint.save(state_path, {"cursor": cursor, "done": sorted(done), "scanned": batch_start,
+                                     "set": stats["set"], "last_total": state.get("last_total")})
+
+    def progress(force: bool = False) -> None:
+        nonlocal last_report
+        now = time.monotonic()
+        if not force and now - last_report < COVER_PROGRESS_S:
+            return
+        last_report = now
+        rate = (stats["scanned"] - resumed_at) / max(now - t0, 1e-6)
+        line = (f"[cover] scanned={stats['scanned']}{f'/{total}' if total else ''} set={stats['set']} "
+                f"from_cache={stats['from_cache']} failed={stats['failed']} {rate:.1f} pages/s")
+        if total and rate > 0:
+            line += f" eta={_fmt_eta(max(0, total - stats['scanned']) / rate)}"
+        print(line, flush=True)
+        save()
+
+    cursor = state["cursor"]
+    batch_start = stats["scanned"]
+    with ThreadPoolExecutor(max_workers=max(1, args.cover_workers)) as ex:
+        for pages, next_cursor in _cover_batches(cursor):
+            batch_start = stats["scanned"]
+            jobs = []
+            for page in pages:
+                stats["scanned"] += 1
+                if page["id"] in done:
+                    continue
+                url, from_cache = _cover_target(page)
+                if not url:
+                    continue
+                if args.dry_run:
+                    print(f"[dry] Would set cover {page['id']}: {url}{' (cache)' if from_cache else ''}")
+                    stats["set"] += 1
+                    stats["from_cache"] += int(from_cache)
+                    continue
+                jobs.append((page, from_cache, ex.submit(_write_cover, page, url, from_cache)))
+
+            for page, from_cache, fut in jobs:
+                try:
+                    snapshot.upsert(fut.result())
+                except Exception as e:
+                    stats["failed"] += 1
+                    print(f"[cover] failed {page['id']}: {e}")
+                else:
+                    stats["set"] += 1
+                    stats["from_cache"] += int(from_cache)
+                    done.add(page["id"])
+                progress()
+            progress()
+
+            # Sorgu sayfası bitti: imleç ilerler, tamamlanan ID listesi sıfırlanır
+            cursor = next_cursor
+            batch_start = stats["scanned"]
+            done.clear()
+            save()
+
+    state["last_total"] = stats["scanned"]
+    progress(force=True)
+    if not args.dry_run:
+        checkpoint.save(state_path, {**fresh, "last_total": stats["scanned"]})
+    print(f"[cover] Done. Scanned={stats['scanned']}, set={stats['set']} "
+          f"(from cache={stats['from_cache']}, failed={stats['failed']})")
+
+
+# -----------------------------
+# Main
+# -----------------------------
+def main():
+    ap = argparse.ArgumentParser("Notion × Letterboxd sync")
+    ap.add_argument("--limit", type=int, default=0, help="Eksik alan taramada işlenecek satır sayısı (0=limitsiz)")
+    ap.add_argument("--dry-run", action="store_true", help="Notion'a yazmadan sadece logla")
+    ap.add_argument(
+        "--set-covers",
+        action="store_true",
+        help="Tüm sayfalarda Backdrop URL'sini sayfa cover'ı olarak ayarla (tek seferlik)",
+    )
+    ap.add_argument("--cover-workers", type=int, default=4,
+                    help="--set-covers için paralel kapak yazan worker sayısı (Notion rate limit'i ortak)")
+    ap.add_argument("--recent-hours", type=int, default=0,
+                    help="Son N saatte düzenlenen sayfaları dene (eksik alan şartı yok). 0=kapalı")
+    ap.add_argument("--recent-limit", type=int, default=50,
+                    help="--recent-hours açıkken maksimum sayfa sayısı (0=limitsiz)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Sadece son çalışmadan beri düzenlenen sayfaları işle (checkpoint: <cache-dir>/incremental.json)")
+    ap.add_argument("--snapshot", action="store_true",
+                    help="Aday seçimi ve cover kontrolü için yerel Notion kopyasını kullan (<cache-dir>/snapshot.sqlite)")
+    ap.add_argument("--snapshot-rebuild", action="store_true",
+                    help="Yerel Notion kopyasını sıfırdan oluştur (silinen sayfaları da düşürür)")
+    ap.add_argument("--import-export", metavar="ZIP",
+                    help="Letterboxd data export ZIP'indeki, veritabanında olmayan filmler için satır oluştur; "
+                         "ardından normal doldurma akışı çalışır (checkpoint: <cache-dir>/import.json)")
+    ap.add_argument("--import-workers", type=int, default=3,
+                    help="--import-export için paralel sayfa oluşturma sayısı (Notion rate limit'i ortak)")
+    ap.add_argument("--no-journal", action="store_true",
+                    help="İş günlüğünü (<cache-dir>/journal.jsonl) kullanma: yarıda kalan çalışmadan devam edilmez")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Letterboxd/OMDb/TMDb fetch için paralel worker sayısı (1=sıralı)")
+    ap.add_argument("--lb-full-body", action="store_true",
+                    help="Letterboxd sayfasını streaming yerine her zaman tam indir")
+    ap.add_argument("--lb-engine", choices=("auto",) + lb.ENGINES, default="auto",
+                    help="Letterboxd HTML çıkarma motoru (auto: lxml varsa lxml, yoksa scan)")
+    ap.add_argument("--cache-dir", default=".cache",
+                    help="Letterboxd/TMDb sonuçları için yerel SQLite cache klasörü")
+    ap.add_argument("--no-cache", action="store_true", help="Cache'i kullanma (okuma/yazma yok)")
+    ap.add_argument("--clear-cache", action="store_true", help="Başlamadan önce cache'i temizle")
+    ap.add_argument("--tmdb-index", metavar="PATH",
+                    help="Başlık -> TMDb ID indeksi (varsayılan: <cache-dir>/tmdb_index.sqlite; varsa kullanılır)")
+    ap.add_argument("--build-tmdb-index", metavar="GZ",
+                    help="TMDb günlük ID export'undan (movie_ids_MM_DD_YYYY.json.gz) indeksi kur ve çık")
+    ap.add_argument("--metrics-json", metavar="PATH",
+                    help="Çalışma sonunda sayaç/gecikme raporunu JSON olarak yaz")
+    ap.add_argument("--profile", nargs="?", const="", metavar="PATH",
+                    help="Çalışmayı cProfile ile ölç, en sıcak yolları yazdır (PATH verilirse ham pstats da kaydedilir)")
+
+    args = ap.parse_args()
+
+    prof = None
+    if args.profile is not None:
+        import cProfile
+        prof = cProfile.Profile()
+        prof.enable()
+    try:
+        _run(args)
+    finally:
+        if prof:
+            prof.disable()
+            _print_profile(prof, args.profile)
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json, argv=sys.argv[1:])
+            print(f"[metrics] wrote {args.metrics_json}")
+
+
+PROFILE_TOP = 25
+
+def _print_profile(prof: Any, path: str) -> None:
+    import pstats
+
+    if path:
+        prof.dump_stats(path)
+        print(f"[profile] raw stats -> {path}")
+    stats = pstats.Stats(prof, stream=sys.stdout).strip_dirs()
+    print(f"[profile] top {PROFILE_TOP} by cumulative time")
+    stats.sort_stats("cumulative").print_stats(PROFILE_TOP)
+    print(f"[profile] top {PROFILE_TOP} by own time")
+    stats.sort_stats("tottime").print_stats(PROFILE_TOP)
+
+
+def _run(args: argparse.Namespace) -> None:
+    print("[debug] starting...")
+
+    index_path = args.tmdb_index or os.path.join(args.cache_dir, "tmdb_index.sqlite")
+    if args.build_tmdb_index:
+        n = tmdb_index.build(args.build_tmdb_index, index_path)
+        print(f"[tmdb-index] built {n} titles -> {index_path}")
+        return
+    if tmdb_index.configure(index_path):
+        print(f"[tmdb-index] using {index_path}")
+
+    cache.configure(args.cache_dir, enabled=not args.no_cache)
+    omdb.configure(args.cache_dir)
+    lb.configure(args.cache_dir)
+    lb.STREAM = not args.lb_full_body
+    lb.ENGINE = args.lb_engine
+    if args.clear_cache:
+        cache.clear()
+        print("[cache] cleared")
+
+    if args.snapshot or args.snapshot_rebuild:
+        snapshot.configure(args.cache_dir)
+        n = snapshot.refresh(full=args.snapshot_rebuild)
+        print(f"[snapshot] refreshed={n} total={snapshot.count()}")
+
+    # --- Tek seferlik kapak düzeltme modu ---
+    if args.set_covers:
+        _set_covers(args)
+        _print_notion_stats()
+        cache.close()
+        snapshot.close()
+        return
+
+    # --- Letterboxd export'undan toplu ekleme; yeni satırlar aşağıda doldurulur ---
+    if args.import_export:
+        importer.run(args.import_export, os.path.join(args.cache_dir, "import.json"),
+                     workers=args.import_workers, dry_run=args.dry_run)
+
+    # --- Yarıda kalan önceki çalışma: bekleyen yazmalar günlükten ---
+    updated = 0
+    if not args.dry_run and not args.no_journal:
+        recorded = journal.configure(args.cache_dir)
+        if recorded:
+            print(f"[journal] resuming: {recorded} rows recorded, "
+                  f"{len(journal.pending())} pending writes", flush=True)
+            updated += _replay_journal()
+
+    # --- Hangi sayfaları işleyeceğiz? ---
+    # Hepsi lazy: sorgu sayfaları arka planda (sınırlı kuyrukla) çekilirken
+    # ilk satırların zenginleştirilmesi başlar. Filtreleme ana thread'de kalır.
+    pages = None
+    inc = None
+    inc_path = os.path.join(args.cache_dir, "incremental.json")
+    scan = {"fetched": 0, "already_done": 0, "max_seen": None, "journal_skipped": 0}
+    if args.incremental:
+        inc = checkpoint.load(inc_path, {"watermark": None, "done": {}})
+        print(f"[incremental] since={inc['watermark']}")
+        # İlk çalışmada watermark yok: --recent-hours (0 ise tüm veritabanı).
+        # Sorgu limitsiz: --recent-limit aşağıda sadece işlenecek satırlara uygulanır.
+        # Aksi halde watermark dakikasını paylaşan >= limit işlenmiş sayfa (toplu
+        # düzenleme) her çalışmada yeniden gelir ve watermark hiç ilerlemez.
+        fetched = nz.iter_recent_pages(hours=args.recent_hours, limit=0,
+                                       since=inc["watermark"], ascending=True)
+        pages = _select_incremental(inc, _prefetch(fetched), scan)
+    elif args.recent_hours and args.recent_hours > 0:
+        fetched = nz.iter_recent_pages(hours=args.recent_hours, limit=args.recent_limit)
+        # Sadece Letterboxd linki olanları bırak
+        pages = (p for p in _counted(_prefetch(fetched), scan) if _has_letterboxd(p))
+    elif snapshot.enabled():
+        pages = _counted(snapshot.iter_pages_needing_fill(limit=args.limit), scan)
+    else:
+        pages = _counted(_prefetch(nz.iter_pages_needing_fill(limit=args.limit)), scan)
+    if journal.enabled():
+        pages = _journal_filter(pages, scan)
+    if inc is not None and args.recent_limit:
+        pages = itertools.islice(pages, args.recent_limit)
+
+    unchanged = 0
+    avoided = 0
+
+    idle = time.perf_counter()
+    for row in _iter_enriched(pages, args.workers):
+        # Yazıcının bir sonraki zenginleştirilmiş satırı beklediği süre
+        metrics.observe("stage.wait", time.perf_counter() - idle)
+        if row is None:
+            idle = time.perf_counter()
+            continue
+
+        print(f"[debug] row {row.idx}: title='{row.title}' url='{row.lb_url}'")
+
+        avoided += row.avoided
+        edited = None
+        if row.complete:
+            print(f"[skip] {row.title or 'Unknown'}: nothing missing")
+        elif not row.payload:
+            print(f"[skip] {row.title or 'Unknown'}: no data found")
+        elif args.dry_run:
+            # Notion update (tek yazıcı, sırayla)
+            print(f"[dry] Would update {row.title or 'Unknown'}: {row.payload}")
         else:
-            nz.update_page(pid, payload, existing_props=props)
-            updated += 1
-            time.sleep(0.2)  # Notion rate-limit güvenliği
+            try:
+                with metrics.timer("stage.write"):
+                    edited = nz.update_page(row.page["id"], row.payload,
+                                            existing_props=row.page["properties"],
+                                            existing_cover=row.page.get("cover"))
+            except Exception as e:
+                if not nz.is_gone(e):
+                    raise
+                # Kopyada eskimiş kalmış (arşivlenmiş/silinmiş) sayfa: çalışmayı düşürme
+                snapshot.upsert({**row.page, "archived": True})
+                print(f"[gone] {row.title or 'Unknown'}: archived or deleted in Notion")
+            else:
+                snapshot.upsert(edited)
+                if edited is None:
+                    unchanged += 1
+                    print(f"[same] {row.title or 'Unknown'}: already up to date")
+                else:
+                    updated += 1
+
+        journal.done(row.page["id"], (edited or row.page).get("last_edited_time"))
+        if inc is not None and not args.dry_run:
+            _inc_mark(inc, row.page, edited)
+            checkpoint.save(inc_path, inc)
+        idle = time.perf_counter()
+
+    print(f"[debug] fetched {scan['fetched']} rows")
+    if journal.enabled():
+        journal.STATS["skipped"] = scan["journal_skipped"]
+        print(f"[journal] replayed={journal.STATS['replayed']} skipped={scan['journal_skipped']}")
+        # Temiz bitti: bir sonraki çalışma sıfırdan başlar
+        journal.reset()
+        journal.close()
+    if inc is not None:
+        print(f"[incremental] already_done={scan['already_done']}")
+    if inc is not None and not args.dry_run:
+        # Linksiz/önceden işlenmiş sayfalar da watermark'ı ilerletir
+        if scan["max_seen"] and (not inc["watermark"] or scan["max_seen"] > inc["watermark"]):
+            inc["watermark"] = scan["max_seen"]
+        _inc_prune(inc)
+        checkpoint.save(inc_path, inc)
+        print(f"[incremental] watermark={inc['watermark']}")
 
+    _print_notion_stats()
+    print(f"[http] requests={transport.STATS['requests']} retries={transport.STATS['retries']} "
+          f"backoff={transport.STATS['sleep_s']:.1f}s deduplicated={transport.STATS['coalesced']}")
+    print(f"[omdb] calls={omdb.STATS['calls']} budget_skips={omdb.STATS['budget_skips']} "
+          f"left_today={omdb.budget_left()}")
+    print(f"[letterboxd] pages={lb.STATS['pages']} early_stops={lb.STATS['early_stops']} "
+          f"refetch={lb.STATS['full_refetch']} bytes_read={lb.STATS['bytes_read']} "
+          f"bytes_saved={lb.STATS['bytes_saved']}")
+    if cache.enabled():
+        print(f"[cache] hits={cache.STATS['hits']} misses={cache.STATS['misses']}")
+    if tmdb_index.enabled():
+        print(f"[tmdb-index] lookups={tmdb_index.STATS['lookups']} hits={tmdb_index.STATS['hits']}")
+        tmdb_index.close()
+    cache.close()
+    snapshot.close()
+    print(f"[plan] source calls avoided={avoided}")
+    print(f"[notion] written={updated} unchanged={unchanged}")
+    for line in metrics.summary_lines("stage."):
+        print(line)
+    metrics.incr("rows.fetched", scan["fetched"])
+    metrics.incr("rows.updated", updated)
+    metrics.incr("rows.unchanged", unchanged)
+    metrics.incr("plan.calls_avoided", avoided)
     print(f"Done. Updated {updated} pages.")
 
 
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+# -----------------------------
+# Çalışma metrikleri: sayaçlar + gecikme histogramları (thread-safe)
+# -----------------------------
+# İsimler nokta ayrımlı: "http.letterboxd.com.requests", "stage.scrape", "notion.pages.update" ...
+# Modüllerin kendi STATS sözlükleri register() ile rapora eklenir.
+
+# Histogram kova sınırları (ms); son kova +inf
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+_counters: Dict[str, float] = {}
+_hists: Dict[str, "_Hist"] = {}
+_sources: Dict[str, Union[Dict[str, Any], Callable[[], Dict[str, Any]]]] = {}
+_lock = threading.Lock()
+_started = time.time()
+
+
+class _Hist:
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, secs: float) -> None:
+        self.count += 1
+        self.total += secs
+        self.min = min(self.min, secs)
+        self.max = max(self.max, secs)
+        self.buckets[bisect_left(BUCKETS_MS, secs * 1000)] += 1
+
+    def quantile(self, q: float) -> float:
+        """Kova üst sınırından yaklaşık değer (ms); son kovada max kullanılır."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKETS_MS[i], self.max * 1000) if i < len(BUCKETS_MS) else self.max * 1000
+        return self.max * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_s": round(self.total, 4),
+            "mean_ms": round(self.total * 1000 / self.count, 2) if self.count else 0.0,
+            "min_ms": round(self.min * 1000, 2) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 2),
+            "p50_ms": round(self.quantile(0.5), 2),
+            "p95_ms": round(self.quantile(0.95), 2),
+            "buckets_ms": {
+                (f"<={b}" if i < len(BUCKETS_MS) else f">{BUCKETS_MS[-1]}"): n
+                for i, (b, n) in enumerate(zip(BUCKETS_MS + (None,), self.buckets)) if n
+            },
+        }
+
+
+def incr(name: str, n: float = 1) -> None:
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def observe(name: str, secs: float) -> None:
+    with _lock:
+        h = _hists.get(name)
+        if h is None:
+            h = _hists[name] = _Hist()
+        h.add(secs)
+
+
+@contextmanager
+def timer(name: str) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - t0)
+
+
+def timed(name: str) -> Callable:
+    """Fonksiyon süresini `name` histogramına yazan dekoratör."""
+    def deco(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with timer(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def register(name: str, stats: Union[Dict[str, Any], Callable[[], Dict[str, Any]]]) -> None:
+    """Modülün STATS sözlüğünü (ya da onu üreten fonksiyonu) rapora ekle."""
+    _sources[name] = stats
+
+
+def report(**extra: Any) -> Dict[str, Any]:
+    with _lock:
+        counters = dict(sorted(_counters.items()))
+        hists = {k: h.to_dict() for k, h in sorted(_hists.items())}
+    sources = {}
+    for name, src in sorted(_sources.items()):
+        try:
+            sources[name] = dict(src() if callable(src) else src)
+        except Exception as e:  # rapor yüzünden çalışma düşmesin
+            sources[name] = {"error": str(e)}
+    return {
+        "started": _started,
+        "elapsed_s": round(time.time() - _started, 3),
+        **extra,
+        "counters": counters,
+        "latency": hists,
+        "stats": sources,
+    }
+
+
+def write_json(path: str, **extra: Any) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report(**extra), f, ensure_ascii=False, indent=2, default=str)
+
+
+def summary_lines(prefix: Optional[str] = None) -> List[str]:
+    """İnsan okuyabilir özet: her histogram için n / p50 / p95 / toplam süre."""
+    with _lock:
+        items = [(k, h.to_dict()) for k, h in sorted(_hists.items())
+                 if prefix is None or k.startswith(prefix)]
+    return [
+        f"[timing] {k} n={d['count']} p50={d['p50_ms']:.0f}ms p95={d['p95_ms']:.0f}ms "
+        f"max={d['max_ms']:.0f}ms total={d['total_s']:.1f}s"
+        for k, d in items
+    ]
@@ -2,15 +2,95 @@
 from __future__ import annotations
 
 import re
-from typing import Any, Dict, List, Optional
-from notion_client import Client
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote
 
-from .config import NOTION_TOKEN, NOTION_DATABASE_ID, NOTION_COLS
+from . import metrics
+from .config import NOTION_TOKEN, NOTION_DATABASE_ID, NOTION_COLS, NOTION_BASE_URL, NOTION_RATE
+from .ratelimit import TokenBucket
+
+if TYPE_CHECKING:
+    from notion_client import Client
+    from notion_client.errors import HTTPResponseError
 
 # -----------------------------
 # Notion client
 # -----------------------------
-client = Client(auth=NOTION_TOKEN)
+# notion_client (httpx ile birlikte) ilk Notion çağrısında import edilip kurulur;
+# --help, --dry-run denemeleri ve token'sız import hızlı kalır.
+_client_obj: Optional["Client"] = None
+_client_lock = threading.Lock()
+
+def _client() -> "Client":
+    global _client_obj
+    if _client_obj is None:
+        with _client_lock:
+            if _client_obj is None:
+                if not NOTION_TOKEN:
+                    raise RuntimeError("NOTION_TOKEN tanımlı değil (Notion modları için gerekli)")
+                from notion_client import Client
+                _client_obj = Client(auth=NOTION_TOKEN,
+                                     **({"base_url": NOTION_BASE_URL} if NOTION_BASE_URL else {}))
+    return _client_obj
+
+def __getattr__(name: str) -> Any:
+    # Eski kullanım: nz.client
+    if name == "client":
+        return _client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Okuma + yazma aynı bütçeden (NOTION_RATE istek/sn, varsayılan 3)
+BUCKET = TokenBucket(rate=NOTION_RATE, burst=max(6, int(NOTION_RATE * 2)))
+metrics.register("notion", lambda: {
+    "calls": BUCKET.calls, "rate_limited": BUCKET.rate_limited,
+    "throttled_s": round(BUCKET.throttled_s, 3), "rate": BUCKET.rate,
+})
+MAX_RETRIES = 5
+_RETRY_STATUS = (429, 500, 502, 503, 504)
+
+def is_gone(err: Exception) -> bool:
+    """Sayfa Notion'da silinmiş (404) ya da arşivlenmiş (400 'archived') mi?"""
+    status = getattr(err, "status", None)
+    return status == 404 or (status == 400 and "archived" in str(err).lower())
+
+def _retry_after(err: HTTPResponseError) -> Optional[float]:
+    try:
+        return float(err.headers.get("retry-after"))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+def _call(endpoint: str, retry_status: Tuple[int, ...] = _RETRY_STATUS, **kwargs) -> Any:
+    """
+    Tüm client çağrıları buradan: rate limit + 429/5xx'te Retry-After'lı yeniden deneme.
+    endpoint: "pages.update", "databases.query" ...
+    retry_status: idempotent olmayan çağrılar (pages.create) sadece 429'da tekrarlanır.
+    """
+    from notion_client.errors import HTTPResponseError
+
+    group, method = endpoint.split(".")
+    fn = getattr(getattr(_client(), group), method)
+    name = f"notion.{endpoint}"
+    attempt = 0
+    while True:
+        BUCKET.acquire()
+        metrics.incr(f"{name}.requests")
+        t0 = time.perf_counter()
+        try:
+            resp = fn(**kwargs)
+        except HTTPResponseError as e:
+            metrics.observe(name, time.perf_counter() - t0)
+            metrics.incr(f"{name}.status.{e.status}")
+            if e.status not in retry_status or attempt >= MAX_RETRIES:
+                raise
+            attempt += 1
+            metrics.incr(f"{name}.retries")
+            BUCKET.penalize(_retry_after(e))
+            continue
+        metrics.observe(name, time.perf_counter() - t0)
+        BUCKET.reward()
+        return resp
 
 # -----------------------------
 # Builders (Notion property payload helpers)
@@ -119,17 +199,49 @@ def find_letterboxd_url(props: Dict[str, Any]) -> Optional[str]:
 # -----------------------------
 # Write helpers (Python -> Notion)
 # -----------------------------
-def update_cover(page_id: str, url: Optional[str]) -> None:
+def retrieve_page(page_id: str) -> Dict[str, Any]:
+    return _call("pages.retrieve", page_id=page_id)
+
+def update_cover(page_id: str, url: Optional[str]) -> Optional[Dict[str, Any]]:
     if not url:
-        return
-    client.pages.update(
+        return None
+    return _call(
+        "pages.update",
         page_id=page_id,
         cover={"type": "external", "external": {"url": url}},
     )
 
-def update_page(page_id: str, data: Dict[str, Any], existing_props: Dict[str, Any] | None = None) -> None:
+def _plain(built: Dict[str, Any]) -> Any:
+    """Builder çıktısını read_prop ile karşılaştırılabilir sade değere çevir."""
+    if "number" in built:
+        return built["number"]
+    if "url" in built:
+        return built["url"]
+    if "rich_text" in built:
+        return "".join(t["text"]["content"] for t in built["rich_text"]).strip()
+    if "multi_select" in built:
+        return [o["name"] for o in built["multi_select"]]
+    return built
+
+def _same_value(existing_props: Dict[str, Any], col: str, built: Dict[str, Any]) -> bool:
+    if col not in existing_props:
+        return False
+    return read_prop(existing_props, col) == _plain(built)
+
+def _cover_url(cover: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not cover:
+        return None
+    return (cover.get(cover.get("type") or "") or {}).get("url")
+
+_UNKNOWN = object()
+
+def update_page(page_id: str, data: Dict[str, Any], existing_props: Dict[str, Any] | None = None,
+                existing_cover: Any = _UNKNOWN) -> Optional[Dict[str, Any]]:
     """
     Python dict -> Notion properties + cover.
+    existing_props / existing_cover verilirse sadece DEĞİŞEN property'ler (ve cover)
+    gönderilir; hiçbir şey değişmediyse API çağrısı yapılmaz.
+    Yazıldıysa güncellenen sayfa nesnesini (yeni last_edited_time ile), yazılmadıysa None döndürür.
     Director / Writer / Cinematography / Cast Top 3 / Countries / Languages: multi-select
     Poster / Backdrop / Trailer URL: URL
     """
@@ -156,10 +268,27 @@ def update_page(page_id: str, data: Dict[str, Any], existing_props: Dict[str, An
         if k in data and NOTION_COLS.get(k):
             props[NOTION_COLS[k]] = _multi(_as_list(data[k]))
 
+    # Opsiyonel ID kolonları: sadece veritabanında varsa, tipine göre
+    for k in ("imdb_id", "tmdb_id"):
+        col = NOTION_COLS.get(k)
+        if k in data and col and existing_props and col in existing_props:
+            ptype = existing_props[col].get("type")
+            if ptype == "number":
+                props[col] = _num(data[k])
+            elif ptype == "url":
+                props[col] = _url(data[k])
+            else:
+                props[col] = _txt(str(data[k]))
+
+    # Notion'da zaten aynı olanları at
+    if existing_props is not None:
+        props = {col: v for col, v in props.items() if not _same_value(existing_props, col, v)}
+
     # Cover from backdrop
     cover_payload = None
     if data.get("backdrop"):
-        cover_payload = {"type": "external", "external": {"url": data["backdrop"]}}
+        if existing_cover is _UNKNOWN or _cover_url(existing_cover) != data["backdrop"]:
+            cover_payload = {"type": "external", "external": {"url": data["backdrop"]}}
 
     # Final update call
     kwargs: Dict[str, Any] = {"page_id": page_id}
@@ -169,7 +298,64 @@ def update_page(page_id: str, data: Dict[str, Any], existing_props: Dict[str, An
         kwargs["cover"] = cover_payload
 
     if len(kwargs) > 1:
-        client.pages.update(**kwargs)
+        return _call("pages.update", **kwargs)
+    return None
+
+def create_page(title: str, lb_url: str, year: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Yeni satır: sadece başlık + Letterboxd linki (+ yıl). Geri kalan kolonlar
+    normal doldurma akışında (iter_pages_needing_fill) tamamlanır.
+    """
+    schema = get_schema()
+    title_col = next((n for n, p in schema.items() if p["type"] == "title"), NOTION_COLS["name"])
+    props: Dict[str, Any] = {title_col: {"title": [{"type": "text", "text": {"content": title}}]}}
+
+    lb_col = NOTION_COLS.get("letterboxd")
+    if lb_col and lb_col in schema:
+        props[lb_col] = _url(lb_url) if schema[lb_col]["type"] == "url" else _txt(lb_url)
+    year_col = NOTION_COLS.get("year")
+    if year and year_col in schema:
+        props[year_col] = _num(year)
+
+    from notion_client.errors import HTTPResponseError
+
+    # pages.create idempotent değil: 5xx'te Notion sayfayı oluşturmuş olabilir.
+    # Tekrar oluşturmadan önce aynı Letterboxd linkli satırı ara.
+    attempt = 0
+    while True:
+        try:
+            return _call(
+                "pages.create",
+                retry_status=(429,),
+                parent={"database_id": NOTION_DATABASE_ID},
+                properties=props,
+            )
+        except HTTPResponseError as e:
+            if e.status not in _RETRY_STATUS or attempt >= MAX_RETRIES:
+                raise
+            attempt += 1
+            metrics.incr("notion.pages.create.retries")
+            BUCKET.penalize(_retry_after(e))
+            existing = find_page_by_letterboxd(lb_url)
+            if existing:
+                metrics.incr("notion.pages.create.recovered")
+                return existing
+
+def find_page_by_letterboxd(lb_url: str) -> Optional[Dict[str, Any]]:
+    """Letterboxd kolonu tam olarak lb_url olan ilk sayfa (yoksa None)."""
+    col = NOTION_COLS.get("letterboxd")
+    schema = get_schema()
+    if not lb_url or not col or col not in schema:
+        return None
+    ptype = schema[col]["type"]
+    resp = _call(
+        "databases.query",
+        database_id=NOTION_DATABASE_ID,
+        page_size=1,
+        filter={"property": col, ptype: {"equals": lb_url}},
+    )
+    results = resp.get("results") or []
+    return results[0] if results else None
 
 # -----------------------------
 # Query helpers
@@ -181,21 +367,108 @@ NEED_KEYS = (
     "countries", "languages", "cast_top", "backdrop", "trailer_url",
 )
 
+# Notion filtresinde is_empty/is_not_empty destekleyen property tipleri
+_EMPTY_FILTER_TYPES = (
+    "title", "rich_text", "url", "number", "multi_select", "select",
+    "files", "date", "people", "email", "phone_number",
+)
+
+_schema: Optional[Dict[str, Dict[str, Any]]] = None
+
+def get_schema() -> Dict[str, Dict[str, Any]]:
+    """Veritabanı property'leri: {kolon adı: {"id", "type"}} (çalışma başına bir kez)."""
+    global _schema
+    if _schema is None:
+        db = _call("databases.retrieve", database_id=NOTION_DATABASE_ID)
+        _schema = {
+            name: {"id": p.get("id"), "type": p.get("type")}
+            for name, p in (db.get("properties") or {}).items()
+        }
+    return _schema
+
+def _need_fill_filter() -> Optional[Dict[str, Any]]:
+    """
+    Letterboxd dolu VE hedef kolonlardan en az biri boş -> Notion compound filter.
+    Şemada olmayan kolonlar atlanır; şema okunamazsa None (filtresiz tarama).
+    """
+    try:
+        schema = get_schema()
+    except Exception:
+        return None
+    lb_col = NOTION_COLS.get("letterboxd")
+    lb_type = (schema.get(lb_col) or {}).get("type")
+    if lb_type not in _EMPTY_FILTER_TYPES:
+        return None
+    empties = []
+    for k in NEED_KEYS:
+        col = NOTION_COLS.get(k)
+        ptype = (schema.get(col) or {}).get("type")
+        if col and ptype in _EMPTY_FILTER_TYPES:
+            empties.append({"property": col, ptype: {"is_empty": True}})
+    if not empties:
+        return None
+    return {"and": [
+        {"property": lb_col, lb_type: {"is_not_empty": True}},
+        {"or": empties},
+    ]}
+
+def _projection(keys: Optional[Iterable[str]] = None) -> Optional[List[str]]:
+    """
+    filter_properties için property ID'leri: verilen NOTION_COLS anahtarları
+    (varsayılan: hepsi) + title. Şema okunamazsa None (tüm property'ler gelir).
+    """
+    try:
+        schema = get_schema()
+    except Exception:
+        return None
+    ids = set()
+    for k in (NOTION_COLS if keys is None else keys):
+        col = NOTION_COLS.get(k)
+        if col in schema and schema[col].get("id"):
+            ids.add(unquote(schema[col]["id"]))
+    for p in schema.values():
+        if p.get("type") == "title" and p.get("id"):
+            ids.add(unquote(p["id"]))
+    return sorted(ids) or None
+
+def missing_keys(props: Dict[str, Any]) -> List[str]:
+    """NEED_KEYS içinden sayfada BOŞ olanlar (veritabanında olmayan kolonlar atlanır)."""
+    out = []
+    for k in NEED_KEYS:
+        col = NOTION_COLS.get(k)
+        if not col or col not in props:
+            continue
+        v = read_prop(props, col)
+        if k in ("year", "runtime"):
+            if v is None:
+                out.append(k)
+        elif v in (None, "", []):
+            out.append(k)
+    return out
+
 def iter_pages_needing_fill(limit: int = 200):
     """
-    Letterboxd linki olan ve hedef alanlarından en az biri boş olan sayfaları döndürür.
-    limit=0 -> limitsiz. Veritabanını sayfalayarak tarar.
+    Letterboxd linki olan ve hedef alanlarından en az biri boş olan sayfaları üretir
+    (lazy generator: sorgu sayfaları tüketildikçe çekilir, limit dolunca durur).
+    limit=0 -> limitsiz. Aday seçimi sunucu tarafında filtreyle yapılır; aşağıdaki
+    istemci tarafı kontrol doğrulama olarak kalır.
     """
     page_size = 100
     start_cursor = None
-    results: List[Dict[str, Any]] = []
+    found = 0
+    query_filter = _need_fill_filter()
+    projection = _projection()
 
     while True:
         payload: Dict[str, Any] = {"database_id": NOTION_DATABASE_ID, "page_size": page_size}
+        if query_filter:
+            payload["filter"] = query_filter
+        if projection:
+            payload["filter_properties"] = projection
         if start_cursor:
             payload["start_cursor"] = start_cursor
 
-        resp = client.databases.query(**payload)
+        resp = _call("databases.query", **payload)
         pages = resp.get("results", [])
         start_cursor = resp.get("next_cursor")
         has_more = resp.get("has_more", False)
@@ -209,84 +482,90 @@ def iter_pages_needing_fill(limit: int = 200):
                 continue
 
             # En az bir hedef alan boş mu?
-            need_any = False
-            for k in NEED_KEYS:
-                col = NOTION_COLS.get(k)
-                if not col or col not in props:
-                    continue
-                v = read_prop(props, col)
-                if k in ("year", "runtime"):
-                    if v is None:
-                        need_any = True
-                        break
-                else:
-                    if v in (None, "", []):
-                        need_any = True
-                        break
-
-            if need_any:
-                results.append(page)
-                if limit and len(results) >= limit:
-                    return results
+            if missing_keys(props):
+                yield page
+                found += 1
+                if limit and found >= limit:
+                    return
 
         if not has_more:
             break
 
-    return results
-
-def iter_all_pages():
-    """Veritabanındaki TÜM sayfaları sayfalamayla getirir (örn. toplu cover set için)."""
+def iter_page_batches(keys: Optional[Iterable[str]] = None, start_cursor: Optional[str] = None):
+    """
+    Tüm veritabanı, sorgu sayfası sayfası: (sayfalar, sonraki imleç) üretir.
+    Sonraki imleç checkpoint'e yazılıp start_cursor olarak verilirse tarama
+    kaldığı yerden sürer; son sayfada imleç None'dır.
+    """
     page_size = 100
-    start_cursor = None
+    projection = _projection(keys)
     while True:
         payload: Dict[str, Any] = {"database_id": NOTION_DATABASE_ID, "page_size": page_size}
+        if projection:
+            payload["filter_properties"] = projection
         if start_cursor:
             payload["start_cursor"] = start_cursor
-        resp = client.databases.query(**payload)
-        for page in resp.get("results", []):
-            yield page
-        if not resp.get("has_more"):
+        resp = _call("databases.query", **payload)
+        start_cursor = resp.get("next_cursor") if resp.get("has_more") else None
+        yield resp.get("results", []), start_cursor
+        if not start_cursor:
             break
-        start_cursor = resp.get("next_cursor")
+
+def iter_all_pages(keys: Optional[Iterable[str]] = None):
+    """
+    Veritabanındaki TÜM sayfaları sayfalamayla getirir.
+    keys: sadece bu NOTION_COLS anahtarlarının property'leri (+ title) istenir.
+    """
+    for pages, _ in iter_page_batches(keys):
+        yield from pages
 
 # --- NEW: son düzenlenen/eklenen sayfaları getir (eksik alan şartı yok) ---
-def iter_recent_pages(hours: int = 36, limit: int = 50):
+def iter_recent_pages(hours: int = 36, limit: int = 50, since: Optional[str] = None,
+                      ascending: bool = False):
     """
     last_edited_time son 'hours' içinde olan sayfaları döndürür.
-    limit=0 -> limitsiz. Eksik alan şartı aramaz; Letterboxd linki olanları
-    main tarafında filtreleyeceğiz.
+    since (ISO zaman) verilirse hours yerine o kullanılır; hours=0 ve since=None
+    ise filtre yoktur. ascending=True -> last_edited_time'a göre artan sıra
+    (incremental mod watermark'ı için).
+    limit=0 -> limitsiz; lazy generator, limit dolunca sorgulamayı keser.
+    Eksik alan şartı aramaz; Letterboxd linki olanları main tarafında filtreleyeceğiz.
     """
     from datetime import datetime, timedelta, timezone
 
-    page_size = 100
+    page_size = min(100, limit) if limit else 100
     start_cursor = None
-    collected: List[Dict[str, Any]] = []
+    found = 0
 
-    since = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+    if since is None and hours:
+        since = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
 
-    base_filter = {
-        "filter": {
+    base_filter: Dict[str, Any] = {}
+    if ascending:
+        base_filter["sorts"] = [{"timestamp": "last_edited_time", "direction": "ascending"}]
+    if since:
+        base_filter["filter"] = {
             "timestamp": "last_edited_time",
             "last_edited_time": {"on_or_after": since}
         }
-    }
+    projection = _projection()
+    if projection:
+        base_filter["filter_properties"] = projection
 
     while True:
         payload = {"database_id": NOTION_DATABASE_ID, "page_size": page_size, **base_filter}
         if start_cursor:
             payload["start_cursor"] = start_cursor
 
-        resp = client.databases.query(**payload)
+        resp = _call("databases.query", **payload)
         pages = resp.get("results", [])
         start_cursor = resp.get("next_cursor")
         has_more = resp.get("has_more", False)
 
         for p in pages:
-            collected.append(p)
-            if limit and len(collected) >= limit:
-                return collected
+            yield p
+            found += 1
+            if limit and found >= limit:
+                return
 
         if not has_more:
             break
-
-    return collected
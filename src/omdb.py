@@ -1,78 +1,135 @@
-import requests
-from .config import TMDB_API_KEY
-
-TMDB_BASE = "https://api.themoviedb.org/3"
-
-def _use_headers():
-    # V4 Bearer varsa header; yoksa v3 key’i querystring
-    return {"Authorization": f"Bearer {TMDB_API_KEY}"} if TMDB_API_KEY and len(TMDB_API_KEY) > 40 else None
-
-def _req(path, params=None):
-    params = params or {}
-    h = _use_headers()
-    if h:
-        return requests.get(f"{TMDB_BASE}{path}", headers=h, params=params, timeout=25)
-    params = {"api_key": TMDB_API_KEY, **params}
-    return requests.get(f"{TMDB_BASE}{path}", params=params, timeout=25)
-
-def _poster_url(p):   return f"https://image.tmdb.org/t/p/w500{p}"  if p else None
-def _backdrop_url(p): return f"https://image.tmdb.org/t/p/w780{p}"  if p else None
-
-def _map(movie, credits=None, details=None, videos=None):
-    m = {**(movie or {}), **(details or {})}
-    out = {
-        "title": m.get("title"),
-        "original_title": m.get("original_title"),
-        "year": int(m["release_date"][:4]) if m.get("release_date") else None,
-        "runtime": m.get("runtime") or None,
-        "synopsis": m.get("overview") or None,
-        "countries": [c.get("name") for c in m.get("production_countries", [])] or None,
-        "languages": [l.get("english_name") for l in m.get("spoken_languages", [])] or None,
-        "poster": _poster_url(m.get("poster_path")),
-        "backdrop": _backdrop_url(m.get("backdrop_path")),
-        "director": None,
-        "writer": None,
-        "cinematography": None,
-        "cast_top": None,
-        "trailer_url": None,
-    }
-    if credits:
-        crew = credits.get("crew", [])
-        out["director"] = ", ".join([c["name"] for c in crew if c.get("job") == "Director"]) or None
-        out["writer"]   = ", ".join([c["name"] for c in crew if c.get("job") in ("Writer","Screenplay","Author")]) or None
-        dops = [c["name"] for c in crew if c.get("job") in ("Director of Photography","Cinematography")]
-        out["cinematography"] = ", ".join(dops) if dops else None
-        cast = credits.get("cast", [])
-        if cast:
-            out["cast_top"] = ", ".join([p["name"] for p in cast[:3]])
-    if videos:
-        vids = videos.get("results", [])
-        yt = [v for v in vids if v.get("site") == "YouTube" and v.get("type") == "Trailer"]
-        if yt:
-            out["trailer_url"] = f"https://youtu.be/{yt[0]['key']}"
-    return out
+from __future__ import annotations
 
-def get_by_title(title: str, year: int | None = None):
-    if not TMDB_API_KEY or not title:
+import os
+import re
+import threading
+from datetime import datetime, timezone
+
+from . import checkpoint, metrics, transport
+from .config import OMDB_API_KEY, OMDB_DAILY_BUDGET
+
+OMDB_BASE = "https://www.omdbapi.com/"
+
+# Günlük istek bütçesi (ücretsiz anahtar ~1000/gün). Sayaç UTC gün bazında
+# <cache-dir>/omdb_quota.json'da tutulur: cache'ten bağımsız, --no-cache /
+# --clear-cache sıfırlamaz. Bütçe bitince get_* None döner ve main TMDb'ye düşer.
+STATS = {"calls": 0, "budget_skips": 0, "used_today": 0}
+metrics.register("omdb", STATS)
+_lock = threading.Lock()
+_day = None
+_quota_path = None
+
+def configure(cache_dir: str) -> None:
+    """Sayaç dosyasının yeri; çağrılmazsa sayaç sadece bu çalışma için tutulur."""
+    global _quota_path, _day
+    with _lock:
+        _quota_path = os.path.join(cache_dir, "omdb_quota.json")
+        _day = None
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+def _load_used(day: str) -> int:
+    if not _quota_path:
+        return 0
+    q = checkpoint.load(_quota_path, {"day": None, "used": 0})
+    return int(q.get("used") or 0) if q.get("day") == day else 0
+
+def _save_used(day: str) -> None:
+    if _quota_path:
+        checkpoint.save(_quota_path, {"day": day, "used": STATS["used_today"]})
+
+def _take_budget() -> bool:
+    global _day
+    with _lock:
+        day = _today()
+        if day != _day:
+            _day = day
+            STATS["used_today"] = _load_used(day)
+        if STATS["used_today"] >= OMDB_DAILY_BUDGET:
+            STATS["budget_skips"] += 1
+            return False
+        STATS["used_today"] += 1
+        STATS["calls"] += 1
+        _save_used(day)
+        return True
+
+def _mark_exhausted() -> None:
+    """OMDb 'Request limit reached!' dediyse bugünün bütçesini bitmiş say."""
+    with _lock:
+        STATS["used_today"] = max(STATS["used_today"], OMDB_DAILY_BUDGET)
+        _save_used(_day or _today())
+
+def budget_left() -> int:
+    with _lock:
+        if _day != _today():
+            return OMDB_DAILY_BUDGET - _load_used(_today())
+        return OMDB_DAILY_BUDGET - STATS["used_today"]
+
+@metrics.timed("omdb.req")
+def _req(params):
+    if not OMDB_API_KEY or not _take_budget():
         return None
-    r = _req("/search/movie", {"query": title})
+    r = transport.get(OMDB_BASE, params={"apikey": OMDB_API_KEY, **params})
     if r.status_code != 200:
+        if "limit" in r.text.lower():
+            _mark_exhausted()
+        return None
+    d = r.json()
+    if d.get("Response") != "True":
+        if "limit" in str(d.get("Error", "")).lower():
+            _mark_exhausted()
         return None
-    res = r.json().get("results") or []
-    if not res:
+    return d
+
+def _val(x):
+    return None if x in (None, "", "N/A") else x
+
+def _names(x):
+    """'A (novel), B, C' -> 'A, B, C' (parantez içi notları at)."""
+    x = _val(x)
+    if not x:
+        return None
+    parts = [re.sub(r"\s*\(.*?\)", "", p).strip() for p in x.split(",")]
+    seen = []
+    for p in parts:
+        if p and p not in seen:
+            seen.append(p)
+    return ", ".join(seen) or None
+
+def _int_prefix(x):
+    m = re.match(r"\s*(\d+)", _val(x) or "")
+    return int(m.group(1)) if m else None
+
+def _map(d):
+    actors = _names(d.get("Actors"))
+    return {
+        "imdb_id": _val(d.get("imdbID")),
+        "tmdb_id": None,
+        "title": _val(d.get("Title")),
+        "year": _int_prefix(d.get("Year")),
+        "runtime": _int_prefix(d.get("Runtime")),
+        "director": _names(d.get("Director")),
+        "writer": _names(d.get("Writer")),
+        "cinematography": None,
+        "cast_top": ", ".join(actors.split(", ")[:3]) if actors else None,
+        "plot": _val(d.get("Plot")),
+        "poster": _val(d.get("Poster")),
+        "countries": [c.strip() for c in _val(d.get("Country")).split(",")] if _val(d.get("Country")) else None,
+        "languages": [l.strip() for l in _val(d.get("Language")).split(",")] if _val(d.get("Language")) else None,
+    }
+
+def get_by_imdb(imdb_id: str):
+    if not imdb_id:
+        return None
+    d = _req({"i": imdb_id, "type": "movie"})
+    return _map(d) if d else None
+
+def get_by_title(title: str, year: int | None = None):
+    if not title:
         return None
-    pick = None
+    params = {"t": title, "type": "movie"}
     if year:
-        for m in res:
-            try:
-                if m.get("release_date") and int(m["release_date"][:4]) == int(year):
-                    pick = m; break
-            except Exception:
-                pass
-    if not pick:
-        pick = res[0]
-    mid = pick["id"]
-    det  = _req(f"/movie/{mid}").json()
-    cred = _req(f"/movie/{mid}/credits").json()
-    vids = _req(f"/movie/{mid}/videos").json()
-    return _map(pick, cred, det, vids)
+        params["y"] = str(year)
+    d = _req(params)
+    return _map(d) if d else None
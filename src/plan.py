@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from . import notion as nz
+from .config import NOTION_COLS
+
+# -----------------------------
+# Alan -> onu üreten en küçük kaynak çağrısı
+# -----------------------------
+# OMDb tek çağrıda bunları verebilir (backdrop/trailer/görüntü yönetmeni yok;
+# orijinal başlık da yok: OMDb'nin Title'ı İngilizce başlık)
+OMDB_FIELDS = frozenset({
+    "year", "runtime", "director", "writer", "poster",
+    "synopsis", "countries", "languages", "cast_top",
+})
+# TMDb: /movie/{id} her zaman gerekir; credits/videos append_to_response ile eklenir
+TMDB_PARTS = {
+    "details": frozenset({
+        "year", "runtime", "poster", "backdrop", "original_title",
+        "synopsis", "countries", "languages",
+    }),
+    "credits": frozenset({"director", "writer", "cinematography", "cast_top"}),
+    "videos":  frozenset({"trailer_url"}),
+}
+APPENDABLE = ("credits", "videos")
+
+# Her şey çekilseydi yapılacak çağrılar: Letterboxd + OMDb + TMDb details/credits/videos
+FULL_CALLS = 5
+
+
+@dataclass
+class Plan:
+    fields: Set[str]                                    # doldurulacak NEED_KEYS
+    imdb_id: Optional[str] = None                       # sayfada kayıtlı ID'ler
+    tmdb_id: Optional[str] = None
+    write_ids: Set[str] = field(default_factory=set)    # boş ID kolonları
+
+    @property
+    def needs_scrape(self) -> bool:
+        """ID sayfada yoksa Letterboxd'dan bulunmalı."""
+        return bool(self.fields) and not (self.imdb_id or self.tmdb_id)
+
+    @property
+    def needs_omdb(self) -> bool:
+        return bool(self.fields & OMDB_FIELDS)
+
+    def tmdb_parts(self, missing: Iterable[str]) -> Tuple[str, ...]:
+        missing = set(missing)
+        return tuple(p for p in APPENDABLE if TMDB_PARTS[p] & missing)
+
+
+def _id_value(props: Dict[str, Any], key: str) -> Optional[str]:
+    v = nz.read_prop(props, NOTION_COLS.get(key))
+    if v in (None, ""):
+        return None
+    if isinstance(v, float) and v.is_integer():
+        v = int(v)
+    return str(v).strip() or None
+
+
+def plan_row(props: Dict[str, Any]) -> Plan:
+    plan = Plan(fields=set(nz.missing_keys(props)))
+    plan.imdb_id = _id_value(props, "imdb_id")
+    plan.tmdb_id = _id_value(props, "tmdb_id")
+    for k, have in (("imdb_id", plan.imdb_id), ("tmdb_id", plan.tmdb_id)):
+        if NOTION_COLS.get(k) in props and not have:
+            plan.write_ids.add(k)
+    return plan
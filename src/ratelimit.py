@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Optional
+
+# -----------------------------
+# Adaptif token bucket (Notion istekleri için)
+# -----------------------------
+
+
+class TokenBucket:
+    """
+    Ortalama `rate` istek/sn, en fazla `burst` istek art arda.
+    429 gelince hız yarıya iner ve Retry-After bitene kadar kimse token alamaz;
+    her başarılı istekte hız `recover_step` kadar artarak hedefe geri döner.
+    Thread-safe: tüm worker'lar aynı bütçeyi paylaşır.
+    """
+
+    def __init__(self, rate: float = 3.0, burst: int = 6,
+                 min_rate: float = 0.3, recover_step: float = 0.05) -> None:
+        self.target_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.recover_step = recover_step
+        self.tokens = float(burst)
+        self.blocked_until = 0.0
+        self.throttled_s = 0.0
+        self.rate_limited = 0
+        self.calls = 0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    self.calls += 1
+                    return
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+                self.throttled_s += wait
+            time.sleep(wait)
+
+    def penalize(self, retry_after: Optional[float] = None) -> None:
+        """429 (ya da geçici sunucu hatası) sonrası: yavaşla ve gerekirse bekle."""
+        with self._lock:
+            self.rate_limited += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+
+    def reward(self) -> None:
+        with self._lock:
+            if self.rate < self.target_rate:
+                self.rate = min(self.target_rate, self.rate + self.recover_step)
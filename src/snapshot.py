@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+from . import metrics
+from . import notion as nz
+from .config import NOTION_COLS
+
+# -----------------------------
+# Notion veritabanının yerel kopyası (SQLite)
+# -----------------------------
+# Her sayfanın id, last_edited_time, cover ve NOTION_COLS property'leri saklanır.
+# refresh() sadece son senkrondan beri düzenlenenleri çeker; silinen/arşivlenen
+# sayfalar ancak tam yenilemede düşer (FULL_REFRESH_DAYS ya da --snapshot-rebuild).
+FULL_REFRESH_DAYS = 7
+
+STATS = {"refreshed": 0, "full_refresh": 0}
+metrics.register("snapshot", STATS)
+
+_conn: Optional[sqlite3.Connection] = None
+_lock = threading.Lock()
+
+
+def configure(cache_dir: str) -> None:
+    global _conn
+    close()
+    os.makedirs(cache_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(cache_dir, "snapshot.sqlite"), check_same_thread=False)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS pages ("
+        " id TEXT PRIMARY KEY, last_edited_time TEXT, data TEXT NOT NULL)"
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.commit()
+    _conn = conn
+
+
+def close() -> None:
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.commit()
+            _conn.close()
+            _conn = None
+
+
+def enabled() -> bool:
+    return _conn is not None
+
+
+def _meta(key: str) -> Optional[str]:
+    row = _conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_meta(key: str, value: str) -> None:
+    _conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+def _slim(page: Dict[str, Any]) -> Dict[str, Any]:
+    """Sadece sync'in okuduğu kısımlar: NOTION_COLS + title property'leri."""
+    wanted = set(NOTION_COLS.values())
+    props = {
+        name: p for name, p in (page.get("properties") or {}).items()
+        if name in wanted or p.get("type") == "title"
+    }
+    return {
+        "id": page["id"],
+        "last_edited_time": page.get("last_edited_time"),
+        "cover": page.get("cover"),
+        "properties": props,
+    }
+
+
+def upsert(page: Optional[Dict[str, Any]]) -> None:
+    """Sorgudan ya da kendi yazmamızdan dönen sayfayı kopyaya işle."""
+    if _conn is None or not page or "id" not in page:
+        return
+    slim = _slim(page)
+    with _lock:
+        if page.get("archived") or page.get("in_trash"):
+            _conn.execute("DELETE FROM pages WHERE id = ?", (page["id"],))
+        else:
+            # ON CONFLICT: rowid korunur, iter_pages sırasında güncellenen sayfa tekrar gelmez
+            _conn.execute(
+                "INSERT INTO pages (id, last_edited_time, data) VALUES (?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET"
+                " last_edited_time = excluded.last_edited_time, data = excluded.data",
+                (slim["id"], slim["last_edited_time"], json.dumps(slim, ensure_ascii=False)),
+            )
+
+
+def refresh(full: bool = False) -> int:
+    """
+    Kopyayı Notion'la eşitle. Watermark varsa sadece on_or_after watermark
+    düzenlenenler çekilir; yoksa (ya da full / süresi dolmuşsa) tam tarama.
+    Dönüş: işlenen sayfa sayısı.
+    """
+    if _conn is None:
+        return 0
+    with _lock:
+        watermark = _meta("watermark")
+        full_at = float(_meta("full_at") or 0)
+    if not watermark or time.time() - full_at > FULL_REFRESH_DAYS * 86400:
+        full = True
+
+    count = 0
+    newest = None if full else watermark
+    if full:
+        with _lock:
+            # Yarıda kalırsa bir sonraki çalışma yine tam tarama yapsın
+            _conn.execute("DELETE FROM meta WHERE key = 'full_at'")
+            _conn.execute("DELETE FROM pages")
+            _conn.commit()
+        pages = nz.iter_all_pages()
+    else:
+        pages = nz.iter_recent_pages(hours=0, limit=0, since=watermark, ascending=True)
+    for page in pages:
+        upsert(page)
+        count += 1
+        t = page.get("last_edited_time")
+        if t and (not newest or t > newest):
+            newest = t
+        if count % 500 == 0:
+            with _lock:
+                _conn.commit()
+
+    with _lock:
+        if newest:
+            _set_meta("watermark", newest)
+        if full:
+            _set_meta("full_at", str(time.time()))
+        _conn.commit()
+    STATS["refreshed"] += count
+    STATS["full_refresh"] += int(full)
+    return count
+
+
+def count() -> int:
+    if _conn is None:
+        return 0
+    with _lock:
+        return _conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+
+def iter_pages() -> Iterator[Dict[str, Any]]:
+    """Kopyadaki tüm sayfalar (iter_all_pages muadili, ağ yok)."""
+    last = 0
+    while _conn is not None:
+        with _lock:
+            rows = _conn.execute(
+                "SELECT rowid, data FROM pages WHERE rowid > ? ORDER BY rowid LIMIT 500", (last,)
+            ).fetchall()
+        if not rows:
+            return
+        for rowid, data in rows:
+            last = rowid
+            yield json.loads(data)
+
+
+def iter_pages_needing_fill(limit: int = 200) -> Iterator[Dict[str, Any]]:
+    """nz.iter_pages_needing_fill muadili; adaylar yerel kopyadan seçilir."""
+    found = 0
+    for page in iter_pages():
+        props = page["properties"]
+        if not nz.read_prop(props, NOTION_COLS.get("letterboxd")):
+            continue
+        if nz.missing_keys(props):
+            yield page
+            found += 1
+            if limit and found >= limit:
+                return
@@ -1,4 +1,4 @@
-import requests
+from . import metrics, tmdb_index, transport
 from .config import TMDB_API_KEY
 
 TMDB_BASE = "https://api.themoviedb.org/3"
@@ -6,13 +6,14 @@ TMDB_BASE = "https://api.themoviedb.org/3"
 def _use_headers():
     return {"Authorization": f"Bearer {TMDB_API_KEY}"} if TMDB_API_KEY and len(TMDB_API_KEY) > 40 else None
 
+@metrics.timed("tmdb.req")
 def _req(path, params=None):
     params = params or {}
     h = _use_headers()
     if h:
-        return requests.get(f"{TMDB_BASE}{path}", headers=h, params=params, timeout=25)
+        return transport.get(f"{TMDB_BASE}{path}", headers=h, params=params, coalesce=True)
     params = {"api_key": TMDB_API_KEY, **params}
-    return requests.get(f"{TMDB_BASE}{path}", params=params, timeout=25)
+    return transport.get(f"{TMDB_BASE}{path}", params=params, coalesce=True)
 
 def _poster_url(p):
     return f"https://image.tmdb.org/t/p/w500{p}" if p else None
@@ -22,19 +23,33 @@ def _backdrop_url(p):
 
 def _map(movie, credits=None, details=None, videos=None):
     m = {**(movie or {}), **(details or {})}
+    # append_to_response=credits,videos ile tek belgede gelenler
+    credits = credits or m.get("credits")
+    videos = videos or m.get("videos")
     out = {
+        "tmdb_id": m.get("id"),
+        "imdb_id": m.get("imdb_id"),
         "title": m.get("title"),
         "original_title": m.get("original_title"),
         "year": int(m["release_date"][:4]) if m.get("release_date") else None,
-        "synopsis": m.get("overview"),
+        "runtime": m.get("runtime") or None,
+        "synopsis": m.get("overview") or None,
         "countries": [c.get("name") for c in m.get("production_countries", [])] or None,
         "languages": [l.get("english_name") for l in m.get("spoken_languages", [])] or None,
         "poster": _poster_url(m.get("poster_path")),
         "backdrop": _backdrop_url(m.get("backdrop_path")),
+        "director": None,
+        "writer": None,
+        "cinematography": None,
         "cast_top": None,
         "trailer_url": None,
     }
     if credits:
+        crew = credits.get("crew", [])
+        out["director"] = ", ".join([c["name"] for c in crew if c.get("job") == "Director"]) or None
+        out["writer"]   = ", ".join([c["name"] for c in crew if c.get("job") in ("Writer","Screenplay","Author")]) or None
+        dops = [c["name"] for c in crew if c.get("job") in ("Director of Photography","Cinematography")]
+        out["cinematography"] = ", ".join(dops) if dops else None
         cast = credits.get("cast", [])
         if cast:
             out["cast_top"] = ", ".join([p["name"] for p in cast[:3]])
@@ -45,27 +60,92 @@ def _map(movie, credits=None, details=None, videos=None):
             out["trailer_url"] = f"https://youtu.be/{yt[0]['key']}"
     return out
 
-def get_by_title(title: str, year: int | None = None):
-    if not TMDB_API_KEY or not title:
+FULL_PARTS = ("credits", "videos")
+
+def _details(mid, movie=None, parts=FULL_PARTS):
+    # details + istenen alt kaynaklar (credits/videos) tek istekte
+    params = {"append_to_response": ",".join(parts)} if parts else None
+    r = _req(f"/movie/{mid}", params)
+    if r.status_code != 200:
+        return None
+    out = _map(movie, details=r.json())
+    out["_parts"] = ["details", *parts]
+    return out
+
+def get_by_id(tmdb_id, parts=FULL_PARTS):
+    """TMDb ID ile doğrudan detay (arama yok)."""
+    if not TMDB_API_KEY or not tmdb_id:
         return None
-    r = _req("/search/movie", {"query": title})
+    return _details(tmdb_id, parts=parts)
+
+def get_by_imdb(imdb_id: str, parts=FULL_PARTS):
+    """IMDb ID -> /find -> TMDb detay (arama yok)."""
+    if not TMDB_API_KEY or not imdb_id:
+        return None
+    r = _req(f"/find/{imdb_id}", {"external_source": "imdb_id"})
     if r.status_code != 200:
         return None
-    res = r.json().get("results") or []
+    res = r.json().get("movie_results") or []
+    if not res:
+        return None
+    return _details(res[0]["id"], res[0], parts)
+
+def _release_year(m):
+    try:
+        return int(m["release_date"][:4]) if m.get("release_date") else None
+    except (TypeError, ValueError):
+        return None
+
+def _from_index(title: str, year, parts):
+    """
+    Yerel indeksin en popüler adayı. Yıl verilmemişse doğrudan alınır; verilmişse
+    önce eksiz (append'siz, küçük) detayla yıl doğrulanır, tam detay sadece kabul
+    edilen ID için istenir. Yıl tutmazsa None -> yıllı arama (en fazla 3 istek).
+    """
+    cands = tmdb_index.lookup(title, limit=1)
+    if not cands:
+        return None
+    mid = cands[0]
+    if not year:
+        return _details(mid, parts=parts)
+    r = _req(f"/movie/{mid}")
+    if r.status_code != 200 or _release_year(r.json()) != year:
+        metrics.incr("tmdb.index.year_mismatch")
+        return None
+    if not parts:
+        out = _map(None, details=r.json())
+        out["_parts"] = ["details"]
+        return out
+    return _details(mid, parts=parts)
+
+def _search(title: str, year=None):
+    params = {"query": title, **({"year": year} if year else {})}
+    r = _req("/search/movie", params)
+    return (r.json().get("results") or []) if r.status_code == 200 else []
+
+def get_by_title(title: str, year: int | None = None, parts=FULL_PARTS):
+    if not TMDB_API_KEY or not title:
+        return None
+    try:
+        year = int(year) if year else None
+    except (TypeError, ValueError):
+        year = None
+
+    out = _from_index(title, year, parts)
+    if out:
+        return out
+
+    # Yıl filtresi önce; sonuç yoksa (vizyon/festival yılı farkı) filtresiz arama
+    res = _search(title, year) if year else []
+    if not res:
+        res = _search(title)
     if not res:
         return None
     pick = None
     if year:
-        for m in res:
-            try:
-                if m.get("release_date") and int(m["release_date"][:4]) == int(year):
-                    pick = m; break
-            except Exception:
-                pass
+        # Tam yıl; yoksa ±1 (festival/vizyon yılı farkı). İkisi de yoksa ilk sonuç.
+        pick = (next((m for m in res if _release_year(m) == year), None)
+                or next((m for m in res if _release_year(m) in (year - 1, year + 1)), None))
     if not pick:
         pick = res[0]
-    mid = pick["id"]
-    det = _req(f"/movie/{mid}").json()
-    cred = _req(f"/movie/{mid}/credits").json()
-    vids = _req(f"/movie/{mid}/videos").json()
-    return _map(pick, cred, det, vids)
+    return _details(pick["id"], pick, parts)
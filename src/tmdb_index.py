@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from typing import List, Optional
+
+from . import metrics
+
+# -----------------------------
+# Yerel başlık -> TMDb ID indeksi (TMDb günlük ID export'undan)
+# -----------------------------
+# Kaynak: http://files.tmdb.org/p/exports/movie_ids_MM_DD_YYYY.json.gz
+# Her satır {"id", "original_title", "popularity", "adult", "video"}; export'ta
+# yıl YOK. Bu yüzden indeks normalize başlık -> popülerliğe göre sıralı ID'ler
+# tutar; yıl kontrolü tmdb.get_by_title'da detay yanıtıyla yapılır.
+# Orijinal başlık tutulduğu için İngilizce olmayan filmler çoğunlukla
+# eşleşmez ve /search/movie'ye düşer.
+CANDIDATES = 3
+BATCH = 10000
+
+STATS = {"lookups": 0, "hits": 0}
+metrics.register("tmdb_index", STATS)
+
+_conn: Optional[sqlite3.Connection] = None
+_lock = threading.Lock()
+
+_NON_ALNUM_RX = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(title: str) -> str:
+    """'Amélie  (Le Fabuleux…)' -> 'amelie le fabuleux' (aksan/noktalama yok)."""
+    s = unicodedata.normalize("NFKD", title or "")
+    s = "".join(c for c in s if not unicodedata.combining(c)).lower().replace("&", " and ")
+    return _NON_ALNUM_RX.sub(" ", s).strip()
+
+
+def build(gz_path: str, db_path: str) -> int:
+    """
+    Export'u satır satır okuyup indeksi baştan kurar (önce geçici dosya, sonra
+    os.replace). Yetişkin ve 'video' kayıtları atlanır. Dönüş: eklenen kayıt sayısı.
+    """
+    d = os.path.dirname(db_path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    tmp = db_path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("CREATE TABLE titles (norm TEXT NOT NULL, pop REAL NOT NULL, id INTEGER NOT NULL)")
+
+    count = 0
+    batch = []
+    with gzip.open(gz_path, "rt", encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            if row.get("adult") or row.get("video") or not row.get("id"):
+                continue
+            norm = normalize(row.get("original_title") or "")
+            if not norm:
+                continue
+            batch.append((norm, float(row.get("popularity") or 0), int(row["id"])))
+            if len(batch) >= BATCH:
+                conn.executemany("INSERT INTO titles VALUES (?, ?, ?)", batch)
+                count += len(batch)
+                batch = []
+    if batch:
+        conn.executemany("INSERT INTO titles VALUES (?, ?, ?)", batch)
+        count += len(batch)
+
+    # İndeks en sonda: toplu eklemeden sonra tek seferde sıralamak daha hızlı
+    conn.execute("CREATE INDEX titles_norm ON titles (norm, pop DESC)")
+    conn.commit()
+    conn.close()
+    close()
+    os.replace(tmp, db_path)
+    return count
+
+
+def configure(db_path: str) -> bool:
+    """İndeks dosyası varsa aç (yükleme yok; sorgular diskten). Yoksa False."""
+    global _conn
+    close()
+    if not os.path.exists(db_path):
+        return False
+    _conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+    return True
+
+
+def close() -> None:
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+
+
+def enabled() -> bool:
+    return _conn is not None
+
+
+def lookup(title: str, limit: int = CANDIDATES) -> List[int]:
+    """Başlığa tam (normalize) eşleşen TMDb ID'leri, popülerden aza."""
+    if _conn is None or not title:
+        return []
+    norm = normalize(title)
+    if not norm:
+        return []
+    with _lock:
+        rows = _conn.execute(
+            "SELECT id FROM titles WHERE norm = ? ORDER BY pop DESC LIMIT ?", (norm, limit)
+        ).fetchall()
+        STATS["lookups"] += 1
+        STATS["hits"] += int(bool(rows))
+    return [r[0] for r in rows]
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from . import metrics
+from .config import HTTP_HOST_MAP
+
+if TYPE_CHECKING:
+    import requests
+
+# -----------------------------
+# Ortak HTTP transport (host başına Session + retry)
+# -----------------------------
+# requests ilk istekte import edilir (--help ve ağ kullanmayan modlar hızlı açılsın).
+DEFAULT_TIMEOUT = 20
+TIMEOUTS: Dict[str, float] = {
+    "letterboxd.com": 15,
+    "boxd.it": 15,
+    "api.themoviedb.org": 25,
+    "omdbapi.com": 20,
+}
+# Host başına eşzamanlı istek sınırı (--workers > 1 iken anlamlı)
+HOST_LIMITS: Dict[str, int] = {
+    "letterboxd.com": 4,
+    "boxd.it": 4,
+    "api.themoviedb.org": 8,
+    "omdbapi.com": 4,
+}
+DEFAULT_HOST_LIMIT = 4
+POOL_SIZE = 16
+
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5   # saniye; 0.5, 1, 2, 4 ... (+ jitter)
+BACKOFF_MAX = 30.0
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
+# Çalışma boyunca aynı (method, URL, params) isteklerini tek uçuşta birleştir
+MEMO_SIZE = 256
+
+STATS: Dict[str, Any] = {"requests": 0, "retries": 0, "sleep_s": 0.0, "coalesced": 0}
+
+metrics.register("http", STATS)
+
+_sessions: Dict[str, requests.Session] = {}
+_slots: Dict[str, threading.BoundedSemaphore] = {}
+_lock = threading.Lock()
+
+
+class _Flight:
+    __slots__ = ("done", "resp", "exc")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.resp: Optional[requests.Response] = None
+        self.exc: Optional[BaseException] = None
+
+
+_memo: "OrderedDict[Tuple, _Flight]" = OrderedDict()
+
+
+def _parse_host_map(raw: str) -> Dict[str, str]:
+    out: Dict[str, str] = {}
+    for item in raw.split(","):
+        host, sep, base = item.partition("=")
+        if sep and host.strip() and base.strip():
+            out[host.strip().lower()] = base.strip().rstrip("/")
+    return out
+
+
+# host -> yerel adres (bench/ stand-in'leri için; DNS override gibi davranır)
+HOST_MAP: Dict[str, str] = _parse_host_map(HTTP_HOST_MAP)
+
+
+_adapter_cls: Any = None
+
+
+def _adapter_class() -> Any:
+    global _adapter_cls
+    if _adapter_cls is not None:
+        return _adapter_cls
+    from requests.adapters import HTTPAdapter
+
+    if not HOST_MAP:
+        _adapter_cls = HTTPAdapter
+        return _adapter_cls
+
+    class _MappedAdapter(HTTPAdapter):
+        """
+        HOST_MAP'teki host'lara giden istekleri yerel adrese gönderir. Host başlığı ve
+        response.url orijinal kalır; redirect'ler (boxd.it -> letterboxd.com) de
+        aynı adapter'dan geçtiği için yönlendirilir.
+        """
+
+        def send(self, request, **kwargs):
+            url = request.url
+            parsed = urlparse(url)
+            host = (parsed.hostname or "").lower()
+            base = HOST_MAP.get(host) or HOST_MAP.get(host[4:] if host.startswith("www.") else "")
+            if not base:
+                return super().send(request, **kwargs)
+            request.url = base + url[len(f"{parsed.scheme}://{parsed.netloc}"):]
+            request.headers["Host"] = parsed.netloc
+            try:
+                resp = super().send(request, **kwargs)
+            finally:
+                request.url = url
+            resp.url = url
+            return resp
+
+    _adapter_cls = _MappedAdapter
+    return _adapter_cls
+
+
+def _host(url: str) -> str:
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _session(host: str) -> requests.Session:
+    import requests
+
+    with _lock:
+        s = _sessions.get(host)
+        if s is None:
+            s = requests.Session()
+            adapter = _adapter_class()(pool_connections=4, pool_maxsize=POOL_SIZE)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _sessions[host] = s
+            _slots[host] = threading.BoundedSemaphore(HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT))
+        return s
+
+
+def _retry_after(resp: requests.Response) -> Optional[float]:
+    """Retry-After başlığı: saniye ya da HTTP tarihi."""
+    from email.utils import parsedate_to_datetime
+
+    val = resp.headers.get("Retry-After")
+    if not val:
+        return None
+    try:
+        return max(0.0, float(val))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(val).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def _backoff(attempt: int, retry_after: Optional[float] = None) -> float:
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, BACKOFF_MAX * 4))
+    return delay
+
+
+def _sleep(host: str, secs: float) -> None:
+    with _lock:
+        STATS["sleep_s"] += secs
+    metrics.incr(f"http.{host}.sleep_s", secs)
+    time.sleep(secs)
+
+
+def get(url: str, *, headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None,
+        allow_redirects: bool = True, stream: bool = False,
+        coalesce: bool = False) -> requests.Response:
+    """
+    requests.get muadili: host başına kalıcı Session, bağlantı havuzu,
+    429/5xx ve bağlantı hatalarında jitter'lı üstel backoff (Retry-After'a uyar).
+    Retry'lar tükenirse son yanıtı döndürür (status kontrolü çağırana kalır);
+    bağlantı hatası sürerse son istisnayı fırlatır.
+
+    coalesce=True: aynı (GET, URL, params, headers) isteği zaten uçuştaysa ya da
+    yakın zamanda tamamlandıysa onun yanıtı paylaşılır (thread'ler arası).
+    Yanıt nesnesi ortak olduğundan çağıranlar onu değiştirmemeli.
+    """
+    if coalesce and not stream:
+        return _coalesced(url, headers, params, timeout, allow_redirects)
+    return _get(url, headers, params, timeout, allow_redirects, stream)
+
+
+def _coalesced(url, headers, params, timeout, allow_redirects) -> requests.Response:
+    key = ("GET", url,
+           tuple(sorted((params or {}).items())),
+           tuple(sorted((headers or {}).items())))
+    with _lock:
+        flight = _memo.get(key)
+        owner = flight is None
+        if owner:
+            flight = _Flight()
+            _memo[key] = flight
+            while len(_memo) > MEMO_SIZE:
+                _memo.popitem(last=False)
+        else:
+            _memo.move_to_end(key)
+            STATS["coalesced"] += 1
+
+    if owner:
+        try:
+            flight.resp = _get(url, headers, params, timeout, allow_redirects, False)
+        except BaseException as e:
+            flight.exc = e
+        finally:
+            # Hatalar ve geçici durumlar saklanmaz; sonraki çağrı yeniden dener
+            if flight.exc is not None or flight.resp.status_code in RETRY_STATUS:
+                with _lock:
+                    if _memo.get(key) is flight:
+                        del _memo[key]
+            flight.done.set()
+    else:
+        flight.done.wait()
+
+    if flight.exc is not None:
+        raise flight.exc
+    return flight.resp
+
+
+def _get(url, headers, params, timeout, allow_redirects, stream) -> requests.Response:
+    import requests
+
+    host = _host(url)
+    sess = _session(host)
+    slot = _slots[host]
+    if timeout is None:
+        timeout = TIMEOUTS.get(host, DEFAULT_TIMEOUT)
+
+    attempt = 0
+    while True:
+        try:
+            with slot:
+                with _lock:
+                    STATS["requests"] += 1
+                metrics.incr(f"http.{host}.requests")
+                t0 = time.perf_counter()
+                resp = sess.get(url, headers=headers, params=params, timeout=timeout,
+                                allow_redirects=allow_redirects, stream=stream)
+                metrics.observe(f"http.{host}", time.perf_counter() - t0)
+        except (requests.ConnectionError, requests.Timeout):
+            metrics.incr(f"http.{host}.errors")
+            if attempt >= MAX_RETRIES:
+                raise
+            delay = _backoff(attempt)
+        else:
+            metrics.incr(f"http.{host}.status.{resp.status_code}")
+            if not stream:
+                # stream=True'da gövdeyi okuyan taraf sayar (letterboxd._fetch)
+                metrics.incr(f"http.{host}.bytes", len(resp.content))
+            if resp.status_code not in RETRY_STATUS or attempt >= MAX_RETRIES:
+                return resp
+            delay = _backoff(attempt, _retry_after(resp))
+            resp.close()
+        attempt += 1
+        with _lock:
+            STATS["retries"] += 1
+        metrics.incr(f"http.{host}.retries")
+        _sleep(host, delay)
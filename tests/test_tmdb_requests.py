@@ -0,0 +1,77 @@
+# TMDb istek sayıları (user-007/009): detay + credits + videos tek istekte gelir.
+# Yerel stand-in TMDb sunucusuna karşı çalışır; ağ gerekmez.
+import pytest
+
+from bench.standins import NotionDB, StandIns, film
+from src import tmdb, transport
+
+HOST = "api.themoviedb.org"
+
+
+@pytest.fixture
+def server(monkeypatch):
+    srv = StandIns(NotionDB(0)).start()
+    monkeypatch.setattr(tmdb, "TMDB_API_KEY", "test")
+    monkeypatch.setattr(transport, "HOST_MAP", {HOST: srv.base_url})
+    # Oturumlar/adapter HOST_MAP'e göre ilk istekte kurulur; temiz başla
+    monkeypatch.setattr(transport, "_adapter_cls", None)
+    monkeypatch.setattr(transport, "_sessions", {})
+    monkeypatch.setattr(transport, "_slots", {})
+    transport._memo.clear()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _requests(srv, fn):
+    before = srv.requests[HOST]
+    out = fn()
+    return out, srv.requests[HOST] - before
+
+
+def test_title_lookup_is_search_plus_one_detail_request(server):
+    f = film(7)
+    out, n = _requests(server, lambda: tmdb.get_by_title(f["title"], f["year"]))
+    assert n == 2
+    assert out["tmdb_id"] == f["tmdb_id"]
+    assert out["director"] and out["cinematography"] and out["cast_top"] and out["trailer_url"]
+
+
+def test_id_lookup_is_one_request(server):
+    f = film(8)
+    out, n = _requests(server, lambda: tmdb.get_by_id(f["tmdb_id"]))
+    assert n == 1
+    assert out["imdb_id"] == f["imdb_id"]
+    assert out["runtime"] == f["runtime"]
+
+
+def test_imdb_lookup_is_find_plus_one_detail_request(server):
+    f = film(9)
+    out, n = _requests(server, lambda: tmdb.get_by_imdb(f["imdb_id"]))
+    assert n == 2
+    assert out["tmdb_id"] == f["tmdb_id"]
+    assert out["writer"]
+
+
+def test_only_requested_parts_are_appended(server):
+    f = film(10)
+    out, n = _requests(server, lambda: tmdb.get_by_id(f["tmdb_id"], parts=("videos",)))
+    assert n == 1
+    assert out["_parts"] == ["details", "videos"]
+    assert out["trailer_url"] and not out["director"]
+
+
+def test_index_candidate_is_year_checked_before_full_details(server, monkeypatch):
+    f = film(11)
+    monkeypatch.setattr(tmdb.tmdb_index, "lookup", lambda title, limit=3: [f["tmdb_id"]])
+    out, n = _requests(server, lambda: tmdb.get_by_title(f["title"], f["year"]))
+    assert n == 2
+    assert out["tmdb_id"] == f["tmdb_id"] and out["director"]
+
+
+def test_index_year_mismatch_falls_back_to_search(server, monkeypatch):
+    f, other = film(12), film(13)
+    monkeypatch.setattr(tmdb.tmdb_index, "lookup", lambda title, limit=3: [other["tmdb_id"]])
+    out, n = _requests(server, lambda: tmdb.get_by_title(f["title"], f["year"]))
+    assert n == 3
+    assert out["tmdb_id"] == f["tmdb_id"]